@@ -0,0 +1,143 @@
+"""
+Бенчмарк холодного старта приложения.
+
+Измеряет время импорта src.main (python -X importtime) с разбивкой по пакетам
+и время от запуска uvicorn до первого успешного ответа /health/live.
+Результат печатается в JSON; с --baseline выводится сравнение с сохраненным
+результатом, например benchmarks/results/startup.json.
+
+    python benchmarks/startup.py --runs 5
+    python benchmarks/startup.py --output benchmarks/results/startup.json
+    python benchmarks/startup.py --baseline benchmarks/results/startup.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def measure_import(module: str) -> dict:
+    """Время импорта модуля в свежем интерпретаторе по данным -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    self_times: Counter[str] = Counter()
+    total_us = 0
+    for line in result.stderr.splitlines():
+        # Формат строки: "import time: <self> | <cumulative> | <имя>"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        self_times[_package(name.strip())] += int(self_us)
+        # Модули верхнего уровня записаны без отступа
+        if not name.startswith("  "):
+            total_us += int(cumulative_us)
+    return {
+        "total_ms": round(total_us / 1000, 1),
+        "packages_ms": {
+            package: round(us / 1000, 1) for package, us in self_times.most_common(15)
+        },
+    }
+
+
+def _package(module: str) -> str:
+    # Модули проекта группируются до подпакета (src.auth), остальные - до пакета
+    parts = module.split(".")
+    return ".".join(parts[:2]) if parts[0] == "src" else parts[0]
+
+
+def measure_first_response(app: str, timeout: float) -> float:
+    """Секунд от запуска процесса uvicorn до первого ответа 200 на /health/live."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    url = f"http://127.0.0.1:{port}/health/live"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port)],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn завершился с кодом {process.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        raise TimeoutError(f"Нет ответа от {url} за {timeout} с")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def run(args: argparse.Namespace) -> dict:
+    imports = [measure_import(args.module) for _ in range(args.runs)]
+    first_response = [
+        measure_first_response(args.app, args.timeout) for _ in range(args.runs)
+    ]
+    # Разбивка по пакетам берется из прогона с медианным временем импорта
+    median_import = sorted(imports, key=lambda item: item["total_ms"])[args.runs // 2]
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "runs": args.runs,
+        "import_ms": median_import["total_ms"],
+        "first_response_ms": round(statistics.median(first_response) * 1000, 1),
+        "import_packages_ms": median_import["packages_ms"],
+    }
+
+
+def compare(result: dict, baseline: dict) -> str:
+    lines = []
+    for key in ("import_ms", "first_response_ms"):
+        before, after = baseline[key], result[key]
+        change = (after - before) / before * 100 if before else 0.0
+        lines.append(f"{key}: {before} -> {after} ({change:+.1f}%)")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк холодного старта")
+    parser.add_argument("--module", default="src.main", help="Импортируемый модуль")
+    parser.add_argument("--app", default="src.main:app", help="Приложение для uvicorn")
+    parser.add_argument("--runs", type=int, default=5, help="Число прогонов")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Секунд на старт")
+    parser.add_argument("--output", type=Path, help="Сохранить результат в JSON-файл")
+    parser.add_argument(
+        "--baseline", type=Path, help="Сравнить с сохраненным результатом"
+    )
+    args = parser.parse_args()
+
+    result = run(args)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.baseline:
+        print(compare(result, json.loads(args.baseline.read_text())))
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(result, ensure_ascii=False, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import time
+
+from ..config import PasswordHashing, settings
+from .utils import hash_password
+
+SAMPLE_PASSWORD = "calibration-password"
+
+
+def measure(config: PasswordHashing, samples: int) -> float:
+    """Среднее время хеширования в миллисекундах."""
+    hash_password(SAMPLE_PASSWORD, config)  # Прогрев
+    start = time.perf_counter()
+    for _ in range(samples):
+        hash_password(SAMPLE_PASSWORD, config)
+    return (time.perf_counter() - start) / samples * 1000
+
+
+def calibrate(scheme: str, target_ms: float, samples: int) -> PasswordHashing:
+    """
+    Подбирает максимальную стоимость хеширования, укладывающуюся в target_ms
+    на текущем железе. Для bcrypt растет число раундов, для argon2id - time_cost
+    при фиксированных memory_cost и parallelism из настроек.
+    """
+    base = settings.password_hashing.model_copy(update={"scheme": scheme})
+    if scheme == "bcrypt":
+        field, cost, limit = "bcrypt_rounds", 4, 31
+    else:
+        field, cost, limit = "argon2_time_cost", 1, 100
+    best = base.model_copy(update={field: cost})
+    while cost <= limit:
+        config = base.model_copy(update={field: cost})
+        elapsed = measure(config, samples)
+        print(f"{field}={cost}: {elapsed:.1f} мс")
+        if elapsed > target_ms:
+            break
+        best = config
+        cost += 1
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Калибровка стоимости хеширования паролей под целевую задержку"
+    )
+    parser.add_argument(
+        "--scheme",
+        choices=["bcrypt", "argon2id"],
+        default=settings.password_hashing.scheme,
+    )
+    parser.add_argument(
+        "--target-ms", type=float, default=250.0, help="Целевое время хеширования"
+    )
+    parser.add_argument("--samples", type=int, default=3, help="Замеров на стоимость")
+    args = parser.parse_args()
+
+    config = calibrate(args.scheme, args.target_ms, args.samples)
+    print("Рекомендуемые настройки:")
+    print(f"PASSWORD_HASHING__SCHEME={config.scheme}")
+    if config.scheme == "bcrypt":
+        print(f"PASSWORD_HASHING__BCRYPT_ROUNDS={config.bcrypt_rounds}")
+    else:
+        print(f"PASSWORD_HASHING__ARGON2_TIME_COST={config.argon2_time_cost}")
+        print(f"PASSWORD_HASHING__ARGON2_MEMORY_COST={config.argon2_memory_cost}")
+        print(f"PASSWORD_HASHING__ARGON2_PARALLELISM={config.argon2_parallelism}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,54 +1,60 @@
+import hmac
 from typing import AsyncGenerator
 
-from fastapi import Depends
+from fastapi import Depends, Header
 from jwt.exceptions import ExpiredSignatureError, PyJWTError
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..config import settings
 from ..database.dao_class import UserDAO
-from ..database.database import async_session_maker
+from ..database.database import async_session_maker, has_writes
+from ..database.writer import run_write
 from .exceptions import (
     InvalidCredentialsException,
+    IntrospectionForbiddenException,
     TokenExpiredException,
     UserIdNotFoundException,
     UserNotFoundException,
 )
-from .schemas import BaseUser, UserEmail, UserId, UserIn
-from .utils import check_password, decode_jwt, get_refresh_token
-
-
-async def get_session_with_commit() -> AsyncGenerator[AsyncSession, None]:
-    """Асинхронная сессия с автоматическим коммитом."""
-    async with async_session_maker() as session:
-        try:
-            yield session
-            await session.commit()
-        except Exception:
-            await session.rollback()
-            raise
-        finally:
-            await session.close()
+from .models import User
+from .schemas import BaseUser, UserEmail, UserHashedPwd, UserId, UserIn
+from .utils import (
+    check_password,
+    decode_jwt,
+    get_refresh_token,
+    hash_password,
+    password_needs_rehash,
+)
 
 
-async def get_session_without_commit() -> AsyncGenerator[AsyncSession, None]:
-    """Асинхронная сессия без автоматического коммита."""
+async def get_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Одна сессия на запрос, общая для всех зависимостей.
+    FastAPI кеширует зависимость в рамках запроса, поэтому get_current_user
+    и обработчик получают один и тот же объект. Соединение берется из пула
+    только при первом запросе к БД, коммит выполняется один раз в конце
+    и только если в сессии были изменения.
+    """
     async with async_session_maker() as session:
         try:
             yield session
+            if has_writes(session):
+                await session.commit()
         except Exception:
             await session.rollback()
             raise
-        finally:
-            await session.close()
 
 
 async def validate_auth_user(
-    user: UserIn, session: AsyncSession = Depends(get_session_without_commit)
+    user: UserIn, session: AsyncSession = Depends(get_session)
 ) -> dict:
     logger.info(f"Проверка пользователя {user.email} на существование в базе данных")
     if not (
         user_data := await UserDAO().find_one_or_none(
-            session=session, filters=UserEmail(email=user.email)
+            session=session,
+            filters=UserEmail(email=user.email),
+            columns=(User.id, User.email, User.hashed_password),
         )
     ):
         logger.warning(f"Пользователь {user.email} не найден")
@@ -57,13 +63,23 @@ async def validate_auth_user(
     if not check_password(password=user.password, hashed=user_data.hashed_password):
         logger.warning(f"Неверный пароль для пользователя {user.email}")
         raise InvalidCredentialsException
+    if password_needs_rehash(user_data.hashed_password):
+        # Прозрачная миграция хеша на текущую схему и стоимость
+        logger.info(f"Перехеширование пароля пользователя {user.email}")
+        values = UserHashedPwd(hashed_password=hash_password(user.password))
+        await run_write(
+            session,
+            lambda session: UserDAO().update(
+                session=session, filters=UserId(id=user_data.id), values=values
+            ),
+        )
     logger.info(f"Пользователь {user.email} успешно аутентифицирован")
     return BaseUser.model_validate(user_data)
 
 
 async def check_refresh_token(
     token: str = Depends(get_refresh_token),
-    session: AsyncSession = Depends(get_session_without_commit),
+    session: AsyncSession = Depends(get_session),
 ) -> BaseUser:
     """
     Проверка refresh-токена.
@@ -79,8 +95,22 @@ async def check_refresh_token(
         raise UserIdNotFoundException
     if not (
         user := await UserDAO().find_one_or_none(
-            session=session, filters=UserId(id=user_id)
+            session=session, filters=UserId(id=user_id), columns=(User.id, User.email)
         )
     ):
         raise UserNotFoundException
     return BaseUser.model_validate(user)
+
+
+async def check_introspection_client(
+    x_introspection_token: str = Header(default=""),
+) -> None:
+    """
+    Проверка секрета сервиса-клиента интроспекции.
+    Если секрет не задан в настройках, доступ закрыт для всех.
+    """
+    expected = settings.introspection.client_token
+    if not expected or not hmac.compare_digest(
+        x_introspection_token.encode(), expected.encode()
+    ):
+        raise IntrospectionForbiddenException
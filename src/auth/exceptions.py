@@ -36,3 +36,8 @@ TokenNoFound = HTTPException(
 InvalidTokenException = HTTPException(
     status_code=status.HTTP_401_UNAUTHORIZED, detail="Токен не валидный"
 )
+
+# Неверный секрет клиента интроспекции
+IntrospectionForbiddenException = HTTPException(
+    status_code=status.HTTP_403_FORBIDDEN, detail="Доступ к интроспекции запрещен"
+)
@@ -0,0 +1,115 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Sequence
+
+from fastapi import HTTPException
+
+from ..config import Introspection, settings
+from .utils import decode_jwt
+
+INACTIVE = {"active": False}
+
+
+def _verify_chunk(tokens: Sequence[str]) -> list[dict]:
+    # Выполняется в пуле; функция уровня модуля, чтобы ее можно было
+    # передать в процесс. Ключ JWT разбирается один раз на воркер
+    results = []
+    for token in tokens:
+        try:
+            results.append({"active": True, **decode_jwt(token=token)})
+        except HTTPException:
+            results.append(INACTIVE)
+    return results
+
+
+class TokenIntrospector:
+    """
+    Пакетная проверка токенов для других сервисов.
+    Проверяются только подпись и срок действия, без обращения к БД.
+    Уникальные токены делятся на порции по числу воркеров пула, результаты
+    кешируются на cache_ttl секунд, но не дольше срока действия токена.
+    """
+
+    def __init__(self, config: Introspection | None = None) -> None:
+        self.config = config or settings.introspection
+        self._executor: Executor | None = None
+        # Токен -> (момент устаревания по time.time(), результат)
+        self._cache: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def introspect(self, tokens: Sequence[str]) -> list[dict]:
+        now = time.time()
+        results: dict[str, dict] = {}
+        pending = []
+        for token in dict.fromkeys(tokens):
+            if (cached := self._cache_get(token, now)) is not None:
+                results[token] = cached
+            else:
+                pending.append(token)
+        self.hits += len(results)
+        self.misses += len(pending)
+
+        if pending:
+            loop = asyncio.get_running_loop()
+            size = math.ceil(len(pending) / self.config.workers)
+            chunks = [pending[i : i + size] for i in range(0, len(pending), size)]
+            verified = await asyncio.gather(
+                *(
+                    loop.run_in_executor(self._get_executor(), _verify_chunk, chunk)
+                    for chunk in chunks
+                )
+            )
+            for chunk, chunk_results in zip(chunks, verified):
+                for token, result in zip(chunk, chunk_results):
+                    results[token] = result
+                    self._cache_set(token, result, now)
+
+        return [results[token] for token in tokens]
+
+    def _cache_get(self, token: str, now: float) -> dict | None:
+        if (entry := self._cache.get(token)) is None:
+            return None
+        expires, result = entry
+        if expires <= now:
+            del self._cache[token]
+            return None
+        self._cache.move_to_end(token)
+        return result
+
+    def _cache_set(self, token: str, result: dict, now: float) -> None:
+        if self.config.cache_ttl <= 0:
+            return
+        expires = now + self.config.cache_ttl
+        if result["active"]:
+            # Активный результат не должен пережить сам токен
+            expires = min(expires, result["exp"])
+        self._cache[token] = (expires, result)
+        self._cache.move_to_end(token)
+        while len(self._cache) > self.config.cache_size:
+            self._cache.popitem(last=False)
+
+    def _get_executor(self) -> Executor:
+        # Пул создается при первом запросе, чтобы не замедлять старт воркера
+        if self._executor is None:
+            executor_class = (
+                ProcessPoolExecutor
+                if self.config.executor == "process"
+                else ThreadPoolExecutor
+            )
+            self._executor = executor_class(max_workers=self.config.workers)
+        return self._executor
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "cached": len(self._cache)}
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+token_introspector = TokenIntrospector()
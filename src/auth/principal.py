@@ -0,0 +1,17 @@
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """
+    Аутентифицированный пользователь запроса.
+    Неизменяемый объект со слотами вместо ORM-сущности User: без identity map,
+    инструментированных атрибутов и загруженного профиля. Обработчики, которым
+    нужна полная сущность, загружают ее явно.
+    """
+
+    id: str
+    email: str
+    is_active: bool
+    jti: str | None = field(repr=False)  # Идентификатор токена, которым выполнен вход
+    exp: int = field(repr=False)  # Время истечения токена, Unix time
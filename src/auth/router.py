@@ -5,17 +5,29 @@ from fastapi import APIRouter, Body, Depends, Query, Response, status
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..celery_app.tasks.email import send_verification_email
+from ..celery_app.dispatch import send_verification_email
 from ..config import AccessTokenType
-from ..database.dao_class import UserDAO
+from ..database.dao_class import ProfileDAO, UserDAO
+from ..database.query_stats import QueryBudget
+from ..database.writer import run_write
 from .dependencies import (
+    check_introspection_client,
     check_refresh_token,
-    get_session_with_commit,
+    get_session,
     validate_auth_user,
 )
 from .exceptions import UserAlreadyExistsException, UserNotFoundException
+from .introspection import token_introspector
 from .models import User
-from .schemas import UserCreateResponse, UserEmail, UserId, UserIn, UserInDB
+from .schemas import (
+    TokenIntrospectRequest,
+    TokenIntrospectResponse,
+    UserCreateResponse,
+    UserEmail,
+    UserId,
+    UserIn,
+    UserInDB,
+)
 from .utils import hash_password, set_access_token_cookie, set_refresh_token_cookie
 
 app = APIRouter(prefix="/auth", tags=["AuthJWT"])
@@ -26,10 +38,11 @@ app = APIRouter(prefix="/auth", tags=["AuthJWT"])
     response_model=UserCreateResponse,
     status_code=status.HTTP_201_CREATED,
     description="Регистрация пользователя",
+    dependencies=[Depends(QueryBudget(4))],
 )
 async def register_user(
     user: Annotated[UserIn, Body(default=..., description="Данные пользователя")],
-    session: AsyncSession = Depends(get_session_with_commit),
+    session: AsyncSession = Depends(get_session),
 ) -> UserCreateResponse:
     """
     Регистрация нового пользователя.
@@ -37,23 +50,27 @@ async def register_user(
     """
     logger.info(f"Проверка пользователя {user.email} на существование в базе данных")
     if user_data := await UserDAO().find_one_or_none(
-        session=session, filters=UserEmail(email=user.email)
+        session=session, filters=UserEmail(email=user.email), columns=(User.id,)
     ):
         logger.warning(f"Пользователь {user.email} уже существует")
         raise UserAlreadyExistsException
 
-    user_data = await UserDAO().register_user(
-        session=session,
-        values=UserInDB(email=user.email, hashed_password=hash_password(user.password)),
+    # Хеш считается до записи, чтобы не занимать писателя
+    values = UserInDB(email=user.email, hashed_password=hash_password(user.password))
+    user_data = await run_write(
+        session, lambda session: UserDAO().register_user(session=session, values=values)
     )
     # Запуск задачи отправки письма для активации
-    task = send_verification_email.delay(email=user.email, user_id=user_data.id)
+    send_verification_email(email=user.email, user_id=user_data.id)
     logger.info(f"Пользователь {user.email} успешно зарегистрирован")
     return UserCreateResponse()
 
 
 @app.post(
-    "/login", status_code=status.HTTP_200_OK, description="Авторизация пользователя"
+    "/login",
+    status_code=status.HTTP_200_OK,
+    description="Авторизация пользователя",
+    dependencies=[Depends(QueryBudget(2))],  # Поиск + возможное перехеширование
 )
 async def login_user(
     response: Response,
@@ -76,7 +93,12 @@ async def logout(response: Response) -> dict:
     return {"message": "Пользователь успешно вышел из системы"}
 
 
-@app.post("/refresh", status_code=status.HTTP_200_OK, description="Обновление токенов")
+@app.post(
+    "/refresh",
+    status_code=status.HTTP_200_OK,
+    description="Обновление токенов",
+    dependencies=[Depends(QueryBudget(1))],
+)
 async def refresh_tokens(
     response: Response,
     user: User = Depends(check_refresh_token),
@@ -89,22 +111,40 @@ async def refresh_tokens(
     return {"ok": True, "message": "Токены успешно обновлены!"}
 
 
-@app.get("/activate", status_code=status.HTTP_200_OK, description="Активация аккаунта")
+@app.get(
+    "/activate",
+    status_code=status.HTTP_200_OK,
+    description="Активация аккаунта",
+    dependencies=[Depends(QueryBudget(2))],
+)
 async def activate_account(
     user_id: Annotated[UserId, Query(..., description="ID пользователя")],
-    session: AsyncSession = Depends(get_session_with_commit),
+    session: AsyncSession = Depends(get_session),
 ):
     """
     Активация аккаунта пользователя.
     """
-    if (
-        user_data := await UserDAO().find_one_or_none_by_id(
-            session=session, data_id=user_id.id
-        )
-    ) and not user_data.profile.is_active:
-        user_data.profile.is_active = True
-        session.add(user_data)
-        logger.info(f"Аккаунт пользователя {user_data.email} успешно активирован")
+    if await run_write(
+        session, lambda session: ProfileDAO().activate(session=session, filters=user_id)
+    ):
+        logger.info(f"Аккаунт пользователя с ID {user_id.id} успешно активирован")
         return {"message": "Аккаунт успешно активирован!"}
     logger.warning(f"Пользователь с ID {user_id.id} не найден или уже активирован")
     raise UserNotFoundException
+
+
+@app.post(
+    "/introspect",
+    response_model=TokenIntrospectResponse,
+    response_model_exclude_none=True,
+    status_code=status.HTTP_200_OK,
+    description="Пакетная проверка токенов для других сервисов",
+    dependencies=[Depends(check_introspection_client), Depends(QueryBudget(0))],
+)
+async def introspect_tokens(request: TokenIntrospectRequest) -> TokenIntrospectResponse:
+    """
+    Проверка подписи и срока действия пакета токенов без обращения к БД.
+    Для каждого токена возвращается признак active и, если он активен, claims.
+    """
+    results = await token_introspector.introspect(request.tokens)
+    return TokenIntrospectResponse(results=results)
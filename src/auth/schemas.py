@@ -1,5 +1,7 @@
 from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
+from ..config import settings
+
 
 class UserId(BaseModel):
     id: str = Field(
@@ -30,7 +32,7 @@ class UserIn(UserPwd, UserEmail):
     pass
 
 
-class UserInDB(UserEmail):
+class UserHashedPwd(BaseModel):
     hashed_password: str = Field(
         ...,
         description="Хешированный пароль пользователя",
@@ -38,6 +40,10 @@ class UserInDB(UserEmail):
     )
 
 
+class UserInDB(UserHashedPwd, UserEmail):
+    pass
+
+
 class BaseUser(UserEmail, UserId):
     pass
 
@@ -47,3 +53,29 @@ class UserCreateResponse(BaseModel):
         default="Пользователь успешно создан",
         description="Сообщение об успешном создании пользователя",
     )
+
+
+class TokenIntrospectRequest(BaseModel):
+    tokens: list[str] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.introspection.max_batch,
+        description="JWT-токены для проверки",
+    )
+
+
+class TokenIntrospection(BaseModel):
+    active: bool = Field(..., description="Токен подписан этим сервисом и не истек")
+    sub: str | None = Field(default=None, description="Идентификатор пользователя")
+    email: EmailStr | None = None
+    type: str | None = Field(default=None, description="Тип токена: access или refresh")
+    exp: int | None = Field(default=None, description="Время истечения, Unix time")
+    iat: int | None = Field(default=None, description="Время выпуска, Unix time")
+    jti: str | None = Field(default=None, description="Уникальный идентификатор токена")
+    iss: str | None = None
+
+
+class TokenIntrospectResponse(BaseModel):
+    results: list[TokenIntrospection] = Field(
+        ..., description="Результаты в порядке токенов запроса"
+    )
@@ -1,34 +1,87 @@
 import datetime
 import uuid
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any
 
 import bcrypt
 import jwt
+from argon2 import PasswordHasher, Type
+from argon2.exceptions import InvalidHashError, VerifyMismatchError
 from fastapi import Request, Response
 
-from ..config import AccessTokenType, settings
+from ..config import AccessTokenType, PasswordHashing, settings
 from .exceptions import InvalidTokenException, TokenExpiredException, TokenNoFound
 from .models import User
 from .schemas import BaseUser
 
+ARGON2_PREFIX = "$argon2"
 
-def hash_password(password: str) -> bytes:
-    salt = bcrypt.gensalt()  # Генерируем соль для хеширования пароля
-    pwd_bytes: bytes = password.encode()  # Преобразуем пароль в байты
-    return bcrypt.hashpw(
-        pwd_bytes, salt
-    )  # Хешируем пароль с использованием сгенерированной соли
+
+def _argon2_hasher(config: PasswordHashing) -> PasswordHasher:
+    return PasswordHasher(
+        time_cost=config.argon2_time_cost,
+        memory_cost=config.argon2_memory_cost,
+        parallelism=config.argon2_parallelism,
+        type=Type.ID,
+    )
+
+
+_argon2 = _argon2_hasher(settings.password_hashing)
+
+
+def hash_password(password: str, config: PasswordHashing | None = None) -> str:
+    """Хеширует пароль схемой и стоимостью из настроек password_hashing."""
+    config = config or settings.password_hashing
+    if config.scheme == "argon2id":
+        if config is not settings.password_hashing:
+            return _argon2_hasher(config).hash(password)
+        return _argon2.hash(password)
+    salt = bcrypt.gensalt(rounds=config.bcrypt_rounds)  # Соль с заданной стоимостью
+    return bcrypt.hashpw(password.encode(), salt).decode()
+
+
+def check_password(password: str, hashed: str) -> bool:
+    """Проверяет пароль, определяя схему по префиксу хеша."""
+    if hashed.startswith(ARGON2_PREFIX):
+        try:
+            return _argon2.verify(hashed, password)
+        except (VerifyMismatchError, InvalidHashError):
+            return False
+    return bcrypt.checkpw(password=password.encode(), hashed_password=hashed.encode())
+
+
+def password_needs_rehash(hashed: str) -> bool:
+    """
+    Нужно ли перехешировать пароль: хеш создан другой схемой
+    или с параметрами, отличными от текущих настроек.
+    """
+    config = settings.password_hashing
+    if hashed.startswith(ARGON2_PREFIX):
+        return config.scheme != "argon2id" or _argon2.check_needs_rehash(hashed)
+    if config.scheme != "bcrypt":
+        return True
+    # Формат bcrypt: $2b$<rounds>$<salt+hash>
+    return int(hashed.split("$")[2]) != config.bcrypt_rounds
+
+
+@lru_cache
+def _signing_key(algorithm: str) -> Any:
+    # Ключ читается и разбирается при первой подписи, а не при импорте модуля,
+    # и не разбирается заново из PEM на каждый токен
+    pem = settings.auth_jwt.private_key_path.read_text()
+    return jwt.get_algorithm_by_name(algorithm).prepare_key(pem)
 
 
-def check_password(password: str, hashed: bytes) -> bool:
-    return bcrypt.checkpw(
-        password=password.encode(), hashed_password=hashed.encode()
-    )  # Проверяем, соответствует ли введенный пароль хешу
+@lru_cache
+def _verifying_key(algorithm: str) -> Any:
+    pem = settings.auth_jwt.public_key_path.read_text()
+    return jwt.get_algorithm_by_name(algorithm).prepare_key(pem)
 
 
 def encode_jwt(
     payload: dict,
-    private_key: str = settings.auth_jwt.private_key_path.read_text(),  # Путь к приватному ключу для подписи JWT
+    private_key: Any = None,  # Приватный ключ для подписи JWT, по умолчанию из настроек
     algorithm: str = settings.auth_jwt.algorithm,  # Алгоритм подписи JWT (например, "RS256")
     expire_timedelta: timedelta = timedelta(
         minutes=settings.auth_jwt.access_token_expire_minutes
@@ -51,20 +104,22 @@ def encode_jwt(
         }
     )
     encoded = jwt.encode(
-        payload=to_encode, key=private_key, algorithm=algorithm
+        payload=to_encode,
+        key=private_key or _signing_key(algorithm),
+        algorithm=algorithm,
     )  # Кодируем JWT с использованием приватного ключа и указанного алгоритма
     return encoded
 
 
 def decode_jwt(
     token: str,
-    public_key: str = settings.auth_jwt.public_key_path.read_text(),
+    public_key: Any = None,  # Публичный ключ для проверки JWT, по умолчанию из настроек
     algorithm: str = settings.auth_jwt.algorithm,
 ) -> dict:
     try:
         decoded = jwt.decode(
             jwt=token,
-            key=public_key,
+            key=public_key or _verifying_key(algorithm),
             algorithms=[algorithm],
             options={"require_exp": True, "verify_signature": True},
         )  # Декодируем JWT с использованием публичного ключа и указанного алгоритма
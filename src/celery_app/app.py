@@ -6,6 +6,29 @@ celery = Celery(
     "src.celery_app.app",
     backend=settings.REDIS_URL,
     broker=settings.REDIS_URL,
-    include=["src.celery_app.tasks.email"],
+    include=[
+        "src.celery_app.tasks.email",
+        "src.celery_app.tasks.cleanup",
+        "src.celery_app.tasks.counters",
+    ],
 )
 
+celery.conf.beat_schedule = {}
+if settings.account_purge.enabled:
+    celery.conf.beat_schedule["purge-inactive-accounts"] = {
+        "task": "src.celery_app.tasks.cleanup.purge_inactive_accounts_task",
+        "schedule": settings.account_purge.interval_minutes * 60,
+    }
+if settings.counters_recount.enabled:
+    celery.conf.beat_schedule["recount-counters"] = {
+        "task": "src.celery_app.tasks.counters.recount_counters_task",
+        "schedule": settings.counters_recount.interval_minutes * 60,
+    }
+
+
+def close_connections() -> None:
+    """Закрывает соединения с брокером и бэкендом результатов в текущем процессе."""
+    celery.pool.force_close_all()
+    # Redis-бэкенд держит собственный пул соединений
+    if (client := getattr(celery.backend, "client", None)) is not None:
+        client.connection_pool.disconnect()
@@ -0,0 +1,18 @@
+import sys
+
+
+def send_verification_email(email: str, user_id: int) -> None:
+    """
+    Постановка задачи отправки письма активации в очередь.
+    Celery, клиент Redis и модули задач импортируются при первой отправке,
+    а не при импорте приложения, чтобы воркеры API стартовали быстрее.
+    """
+    from .tasks.email import send_verification_email as task
+
+    task.delay(email=email, user_id=user_id)
+
+
+def close_connections() -> None:
+    """Закрывает соединения Celery, если он был загружен в этом процессе."""
+    if (celery_app := sys.modules.get("src.celery_app.app")) is not None:
+        celery_app.close_connections()
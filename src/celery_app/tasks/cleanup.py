@@ -0,0 +1,55 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from loguru import logger
+
+from ...config import settings
+from ...database.dao_class import UserDAO
+from ...database.database import standalone_session_maker
+from ..app import celery
+
+
+async def purge_inactive_accounts(max_age_hours: int, batch_size: int) -> dict:
+    """
+    Удаляет неактивированные аккаунты старше max_age_hours порциями по batch_size.
+    Каждая порция выполняется в отдельной короткой транзакции, поэтому таблицы
+    не блокируются надолго.
+    """
+    created_before = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(
+        hours=max_age_hours
+    )
+    start = time.perf_counter()
+    purged = batches = 0
+    last_id = ""
+    async with standalone_session_maker() as session_maker:
+        while True:
+            async with session_maker() as session, session.begin():
+                last_id, purged_ids = await UserDAO().purge_inactive_batch(
+                    session=session,
+                    created_before=created_before,
+                    after_id=last_id,
+                    limit=batch_size,
+                )
+            if last_id is None:
+                break
+            batches += 1
+            purged += len(purged_ids)
+    elapsed = time.perf_counter() - start
+    logger.info(
+        f"Удалено {purged} неактивированных аккаунтов за {elapsed:.2f} с ({batches} порций)"
+    )
+    return {"purged": purged, "batches": batches, "seconds": round(elapsed, 3)}
+
+
+@celery.task
+def purge_inactive_accounts_task():
+    """
+    Периодическая очистка аккаунтов, не подтвержденных по email
+    """
+    config = settings.account_purge
+    return asyncio.run(
+        purge_inactive_accounts(
+            max_age_hours=config.max_age_hours, batch_size=config.batch_size
+        )
+    )
@@ -0,0 +1,18 @@
+import asyncio
+
+from ...database.counters import recount_counters
+from ...database.database import standalone_session_maker
+from ..app import celery
+
+
+async def recount_counters_standalone() -> dict:
+    async with standalone_session_maker() as session_maker:
+        return await recount_counters(session_maker)
+
+
+@celery.task
+def recount_counters_task():
+    """
+    Периодический точный пересчет счетчиков
+    """
+    return asyncio.run(recount_counters_standalone())
@@ -1,9 +1,11 @@
+import os
 from enum import Enum
 from pathlib import Path
+from typing import Literal
 
 from loguru import logger
 from pydantic import BaseModel
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class AuthJwt(BaseModel):
@@ -14,6 +16,124 @@ class AuthJwt(BaseModel):
     refresh_token_expire_days: int = 1
 
 
+class PasswordHashing(BaseModel):
+    scheme: Literal["bcrypt", "argon2id"] = "bcrypt"  # Схема для новых хешей
+    bcrypt_rounds: int = 12  # log2 числа итераций bcrypt
+    argon2_time_cost: int = 3  # Число проходов argon2id
+    argon2_memory_cost: int = 65536  # Память argon2id в КиБ
+    argon2_parallelism: int = 4  # Число потоков argon2id
+
+
+class ServerConfig(BaseModel):
+    host: str = "0.0.0.0"
+    port: int = 8000
+    workers: int = os.cpu_count() or 1  # По умолчанию один воркер на ядро
+    backlog: int = 2048  # Размер очереди ожидающих соединений сокета
+    timeout_keep_alive: int = 5  # Секунд держать keep-alive соединение без запросов
+    timeout_graceful_shutdown: int = 30  # Секунд на завершение активных запросов при остановке
+    limit_max_requests: int | None = 10000  # Перезапуск воркера после N запросов
+    # Случайная добавка к лимиту, своя у каждого воркера, чтобы они
+    # не перезапускались одновременно
+    limit_max_requests_jitter: int = 1000
+    log_level: str = "info"
+
+
+class RouteClassLimit(BaseModel):
+    initial_limit: int  # Начальный лимит одновременных запросов
+    min_limit: int
+    max_limit: int
+    queue_size: int  # Максимум запросов в очереди ожидания
+    queue_timeout: float  # Секунд ожидания в очереди до отказа
+    target_latency: float  # Целевая задержка, секунд; выше нее лимит снижается
+
+
+class AdmissionControl(BaseModel):
+    enabled: bool = True
+    retry_after: int = 1  # Значение заголовка Retry-After при отказе, секунд
+    # Пробы оркестратора не ограничиваются: отказ liveness под нагрузкой
+    # приводит к перезапуску перегруженных подов и каскадному отказу
+    exempt_paths: list[str] = ["/health/live", "/health/ready"]
+    # Дорогие маршруты (хеширование паролей) ограничиваются отдельно
+    auth_paths: list[str] = [
+        "/auth/login",
+        "/auth/register",
+        "/auth/refresh",
+        "/auth/introspect",  # До max_batch проверок подписи RSA за запрос
+    ]
+    auth: RouteClassLimit = RouteClassLimit(
+        initial_limit=4,
+        min_limit=1,
+        max_limit=32,
+        queue_size=64,
+        queue_timeout=2.0,
+        target_latency=0.5,
+    )
+    default: RouteClassLimit = RouteClassLimit(
+        initial_limit=64,
+        min_limit=8,
+        max_limit=512,
+        queue_size=256,
+        queue_timeout=1.0,
+        target_latency=0.2,
+    )
+
+
+class Profiling(BaseModel):
+    enabled: bool = False
+    token: str = ""  # Секрет для заголовка X-Profile-Token; пустой - заголовок отключен
+    sample_rate: float = 0.0  # Доля запросов с полным профилем в файл
+    continuous_rate: float = 0.0  # Доля запросов для агрегированных горячих стеков
+    continuous_flush_seconds: float = 60.0  # Период записи агрегированных стеков
+    interval: float = 0.001  # Интервал сэмплирования, секунд
+    output_dir: Path = Path("profiles")
+
+
+class SqlStats(BaseModel):
+    enabled: bool = True
+    n_plus_one_threshold: int = 3  # Повторов одного запроса, после которых это N+1
+    strict_budget: bool = False  # Превышение бюджета запросов - ошибка (для тестов)
+
+
+class AccountPurge(BaseModel):
+    enabled: bool = True
+    max_age_hours: int = 72  # Возраст неактивированного аккаунта для удаления
+    batch_size: int = 500  # Аккаунтов в одной транзакции
+    interval_minutes: int = 60  # Период запуска задачи в Celery beat
+
+
+class CountersRecount(BaseModel):
+    enabled: bool = True
+    interval_minutes: int = 360  # Период точного пересчета счетчиков
+
+
+class Warmup(BaseModel):
+    enabled: bool = True
+    pool_connections: int = 5  # Сколько соединений пула открыть заранее
+
+
+class Introspection(BaseModel):
+    # Секрет заголовка X-Introspection-Token для сервисов-клиентов;
+    # пустой - интроспекция недоступна
+    client_token: str = ""
+    max_batch: int = 500  # Максимум токенов в одном запросе
+    executor: Literal["thread", "process"] = "thread"  # Пул для проверки подписей
+    workers: int = os.cpu_count() or 1  # Размер пула проверки подписей
+    cache_ttl: float = 5.0  # Секунд хранить результат проверки; 0 - без кеша
+    cache_size: int = 10000  # Максимум токенов в кеше
+
+
+class SqliteConcurrency(BaseModel):
+    # Режим высокой конкурентности SQLite: WAL, настройки каждого соединения,
+    # чтение через пул read-only соединений и запись через единственного писателя
+    enabled: bool = False
+    synchronous: Literal["OFF", "NORMAL", "FULL"] = "NORMAL"  # В WAL NORMAL безопасен
+    busy_timeout_ms: int = 5000  # Ожидание блокировки вместо "database is locked"
+    mmap_size: int = 256 * 1024 * 1024  # Байт файла БД, читаемых через mmap
+    cache_size_kib: int = 64 * 1024  # Страничный кеш одного соединения, КиБ
+    max_batch: int = 64  # Максимум транзакций в одном групповом коммите
+    commit_delay: float = 0.0  # Секунд ожидания новых транзакций перед коммитом
+
+
 class AccessTokenType(str, Enum):
     ACCESS = "access_token_jwt"
     ACCESS_TYPE = "access"
@@ -22,12 +142,31 @@ class AccessTokenType(str, Enum):
 
 
 class Settings(BaseSettings):
+    DEBUG: bool = False
     DB_URL: str = f"sqlite+aiosqlite:///db.sqlite3"
+    # Создавать таблицы при старте приложения; в продакшене схему создает
+    # python -m src.database.migrate
+    DB_CREATE_ON_STARTUP: bool = False
     FORMAT_LOG: str = "{time:YYYY-MM-DD at HH:mm:ss} | {level} | {message}"
     LOG_ROTATION: str = "10 MB"
     BASE_URL: str = "http://localhost:8000"
     REDIS_URL: str = "redis://redis:6379/0"
+    ADMIN_EMAILS: list[str] = []  # Пользователи с доступом к административным маршрутам
+    EXPORT_BATCH_SIZE: int = 1000  # Строк в порции потоковой выгрузки
+    DAO_SINGLE_FLIGHT: bool = True  # Объединять одновременные одинаковые чтения в DAO
     auth_jwt: AuthJwt = AuthJwt()
+    password_hashing: PasswordHashing = PasswordHashing()
+    server: ServerConfig = ServerConfig()
+    admission: AdmissionControl = AdmissionControl()
+    profiling: Profiling = Profiling()
+    sql_stats: SqlStats = SqlStats()
+    account_purge: AccountPurge = AccountPurge()
+    counters_recount: CountersRecount = CountersRecount()
+    warmup: Warmup = Warmup()
+    introspection: Introspection = Introspection()
+    sqlite: SqliteConcurrency = SqliteConcurrency()
+
+    model_config = SettingsConfigDict(env_nested_delimiter="__")
 
 
 # Получаем параметры для загрузки переменных среды
@@ -0,0 +1,51 @@
+import time
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from .dao_class import (
+    COUNTERS_SEEDED,
+    COUNTERS_STALE,
+    SIGNUPS_PREFIX,
+    CounterDAO,
+    UserDAO,
+)
+from .database import snapshot_read_options
+
+
+async def recount_counters(session_maker: async_sessionmaker) -> dict:
+    """
+    Точный пересчет счетчиков пользователей для исправления расхождений.
+    Точные значения и текущие счетчики читаются из одного снимка, а разница
+    прибавляется к счетчикам атомарным приращением. Приращения регистраций,
+    активаций и очистки, закоммиченные после снимка, поэтому не теряются.
+    Отметки устаревания, сделанные после снимка, тоже сохраняются.
+    Первый пересчет засеивает счетчики: до него count выполняется сканированием.
+    """
+    start = time.perf_counter()
+    async with session_maker() as session, session.begin():
+        await session.connection(execution_options=snapshot_read_options(session.bind))
+        exact = await UserDAO().exact_counters(session)
+        current = await CounterDAO().values(session)
+    # Дни, все регистрации которых удалены, обнуляются
+    names = set(exact) | {name for name in current if name.startswith(SIGNUPS_PREFIX)}
+    deltas = {
+        name: delta
+        for name in names
+        if (delta := exact.get(name, 0) - current.get(name, 0))
+    }
+    # Снимок учитывает все изменения в обход счетчиков до него
+    if stale := current.get(COUNTERS_STALE, 0):
+        deltas[COUNTERS_STALE] = -stale
+    async with session_maker() as session, session.begin():
+        await CounterDAO().increment(session, deltas)
+        await CounterDAO().set_values(session, {COUNTERS_SEEDED: 1})
+    elapsed = time.perf_counter() - start
+    logger.info(
+        f"Пересчитано {len(names)} счетчиков за {elapsed:.2f} с, исправлено {len(deltas)}"
+    )
+    return {
+        "counters": len(names),
+        "corrected": len(deltas),
+        "seconds": round(elapsed, 3),
+    }
@@ -1,15 +1,19 @@
-from typing import Generic, List, Type, TypeVar
+from typing import Generic, Hashable, List, Sequence, Type, TypeVar
 
 from loguru import logger
 from pydantic import BaseModel
 from sqlalchemy import delete as sqlalchemy_delete
 from sqlalchemy import func
 from sqlalchemy import update as sqlalchemy_update
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import InvalidRequestError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm.interfaces import ORMOption
+from sqlalchemy.sql.elements import ColumnElement
 
-from .database import Base
+from ..config import settings
+from .database import Base, has_writes
+from .single_flight import single_flight
 
 T = TypeVar("T", bound=Base)
 
@@ -17,12 +21,80 @@ T = TypeVar("T", bound=Base)
 class BaseDAO(Generic[T]):
     model: Type[T] = None
 
-    async def find_one_or_none_by_id(self, session: AsyncSession, data_id: int):
-        # Поиск одной записи по ID
-        try:
-            query = select(self.model).filter_by(id=data_id)
+    def _select(
+        self,
+        columns: Sequence[ColumnElement] | None = None,
+        options: Sequence[ORMOption] | None = None,
+    ):
+        # Запрос всей сущности с опциями загрузки или только выбранных колонок
+        if columns:
+            return select(*columns)
+        return select(self.model).options(*(options or ()))
+
+    def _flight_key(
+        self,
+        method: str,
+        filter_dict: dict,
+        columns: Sequence[ColumnElement] | None = None,
+        options: Sequence[ORMOption] | None = None,
+    ) -> Hashable:
+        # Ключ объединения одинаковых чтений из параметров вызова. Опции загрузки
+        # сравниваются по идентичности, поэтому объединяются вызовы с общими
+        # константами опций, а опции, созданные на месте, не объединяются
+        return (
+            self.model,
+            method,
+            tuple(str(column) for column in columns or ()),
+            tuple(options or ()),
+            tuple(sorted(filter_dict.items())),
+        )
+
+    async def _fetch_one(
+        self,
+        session: AsyncSession,
+        query,
+        columns: Sequence[ColumnElement] | None = None,
+        key: Hashable | None = None,
+    ):
+        # Выполнение запроса одной записи.
+        # Одинаковые одновременные запросы объединяются (single-flight): первый
+        # вызов выполняет запрос в своей сессии, остальные ждут его результат.
+        # ORM-объект вливается в сессию ожидающего через merge без обращения к БД,
+        # строки проекции общие. Сессии с незакоммиченными изменениями читают сами,
+        # чтобы видеть собственные записи.
+        async def load():
             result = await session.execute(query)
-            record = result.scalar_one_or_none()
+            return result.one_or_none() if columns else result.scalar_one_or_none()
+
+        if key is None or not settings.DAO_SINGLE_FLIGHT or has_writes(session):
+            return await load()
+
+        async def follow(record):
+            if record is None or columns:
+                return record
+            try:
+                return await session.merge(record, load=False)
+            except InvalidRequestError:
+                # Лидер успел изменить объект - читаем сами
+                return await load()
+
+        # Вызовы на разных движках (задачи Celery, бенчмарк) не объединяются
+        return await single_flight.do((session.bind, key), load, follow)
+
+    async def find_one_or_none_by_id(
+        self,
+        session: AsyncSession,
+        data_id: int,
+        columns: Sequence[ColumnElement] | None = None,
+        options: Sequence[ORMOption] | None = None,
+    ):
+        # Поиск одной записи по ID.
+        # options - стратегии загрузки связей (joinedload, selectinload, noload),
+        # columns - проекция: вместо ORM-объекта возвращается легкая строка Row
+        try:
+            query = self._select(columns, options).filter_by(id=data_id)
+            key = self._flight_key("id", {"id": data_id}, columns, options)
+            record = await self._fetch_one(session, query, columns, key)
             log_message = f"Запись {self.model.__name__} с ID {data_id} {'найдена' if record else 'не найдена'}."
             logger.info(log_message)
             return record
@@ -30,16 +102,22 @@ class BaseDAO(Generic[T]):
             logger.error(f"Ошибка при поиске записи с ID {data_id}: {e}")
             raise
 
-    async def find_one_or_none(self, session: AsyncSession, filters: BaseModel):
+    async def find_one_or_none(
+        self,
+        session: AsyncSession,
+        filters: BaseModel,
+        columns: Sequence[ColumnElement] | None = None,
+        options: Sequence[ORMOption] | None = None,
+    ):
         # Поиск одной записи по фильтрам
         filter_dict = filters.model_dump(exclude_unset=True)
         logger.info(
             f"Поиск одной записи {self.model.__name__} по фильтрам: {filter_dict}"
         )
         try:
-            query = select(self.model).filter_by(**filter_dict)
-            result = await session.execute(query)
-            record = result.scalar_one_or_none()
+            query = self._select(columns, options).filter_by(**filter_dict)
+            key = self._flight_key("filters", filter_dict, columns, options)
+            record = await self._fetch_one(session, query, columns, key)
             log_message = f"Запись {'найдена' if record else 'не найдена'} по фильтрам: {filter_dict}"
             logger.info(log_message)
             return record
@@ -48,7 +126,12 @@ class BaseDAO(Generic[T]):
             raise
 
     async def find_all(
-        self, session: AsyncSession, filters: BaseModel | None = None, limit: int = None
+        self,
+        session: AsyncSession,
+        filters: BaseModel | None = None,
+        limit: int = None,
+        columns: Sequence[ColumnElement] | None = None,
+        options: Sequence[ORMOption] | None = None,
     ):
         # Поиск всех записей по фильтрам
         filter_dict = filters.model_dump(exclude_unset=True) if filters else {}
@@ -57,13 +140,13 @@ class BaseDAO(Generic[T]):
         )
         try:
             query = (
-                select(self.model)
+                self._select(columns, options)
                 .filter_by(**filter_dict)
                 .order_by(self.model.created_at.desc())
                 .limit(limit)
             )
             result = await session.execute(query)
-            records = result.scalars().all()
+            records = result.all() if columns else result.scalars().all()
             logger.info(f"Найдено {len(records)} записей.")
             return records
         except SQLAlchemyError as e:
@@ -145,6 +228,12 @@ class BaseDAO(Generic[T]):
             logger.error(f"Ошибка при удалении записей: {e}")
             raise
 
+    async def _count_from_counters(
+        self, session: AsyncSession, filter_dict: dict
+    ) -> int | None:
+        # Значение из поддерживаемых счетчиков, если они покрывают фильтр
+        return None
+
     async def count(self, session: AsyncSession, filters: BaseModel | None = None):
         # Подсчет количества записей по фильтрам
         filter_dict = filters.model_dump(exclude_unset=True) if filters else {}
@@ -152,6 +241,10 @@ class BaseDAO(Generic[T]):
             f"Подсчет количества записей {self.model.__name__} по фильтру: {filter_dict}"
         )
         try:
+            count = await self._count_from_counters(session, filter_dict)
+            if count is not None:
+                logger.info(f"Найдено {count} записей (по счетчику).")
+                return count
             query = select(func.count(self.model.id)).filter_by(**filter_dict)
             result = await session.execute(query)
             count = result.scalar()
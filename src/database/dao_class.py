@@ -1,15 +1,149 @@
+import re
+from datetime import date, datetime, timezone
+from typing import AsyncIterator, List, Sequence
+
 from loguru import logger
 from pydantic import BaseModel
-from sqlalchemy import update
+from sqlalchemy import Row, delete, func, select, text, union, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy.sql.elements import ColumnElement
 
 from ..auth.models import Profile, User
 from .dao import BaseDAO
+from .models import Counter
+
+# Имена счетчиков
+USERS_TOTAL = "users:total"
+USERS_ACTIVE = "users:active"
+COUNTERS_SEEDED = "counters:seeded"  # Есть после первого точного пересчета
+# Число изменений в обход счетчиков после последнего пересчета
+COUNTERS_STALE = "counters:stale"
+
+SIGNUPS_PREFIX = "users:signups:"
+
+# Общие опции загрузки: одинаковые одновременные чтения с ними объединяются
+USER_WITH_PROFILE = (joinedload(User.profile),)
+
+
+def signups_counter(day: date) -> str:
+    return f"{SIGNUPS_PREFIX}{day.isoformat()}"
+
+
+class CounterDAO(BaseDAO):
+    model = Counter
+
+    async def increment(self, session: AsyncSession, deltas: dict[str, int]):
+        # Атомарное изменение счетчиков в текущей транзакции
+        await self._upsert(session, deltas, increment=True)
+
+    async def set_values(self, session: AsyncSession, values: dict[str, int]):
+        # Установка точных значений счетчиков после пересчета
+        await self._upsert(session, values, increment=False)
 
+    async def invalidate(self, session: AsyncSession):
+        # Изменение, не отраженное в счетчиках: до следующего пересчета
+        # count выполняется сканированием
+        await self.increment(session, {COUNTERS_STALE: 1})
+
+    async def get_value(self, session: AsyncSession, name: str) -> int | None:
+        # Значение счетчика или None, если счетчики еще не засеяны пересчетом
+        # или устарели после изменений в обход них
+        query = select(self.model.name, self.model.value).where(
+            self.model.name.in_((name, COUNTERS_SEEDED, COUNTERS_STALE))
+        )
+        values = dict((await session.execute(query)).all())
+        if COUNTERS_SEEDED not in values or values.get(COUNTERS_STALE, 0) > 0:
+            return None
+        return values.get(name, 0)
+
+    async def values(self, session: AsyncSession) -> dict[str, int]:
+        # Текущие значения всех счетчиков
+        query = select(self.model.name, self.model.value)
+        return dict((await session.execute(query)).all())
+
+    async def _upsert(
+        self, session: AsyncSession, values: dict[str, int], increment: bool
+    ):
+        # INSERT ... ON CONFLICT DO UPDATE одним запросом на все счетчики
+        if not values:
+            return
+        dialect = postgresql if session.bind.dialect.name == "postgresql" else sqlite
+        try:
+            query = dialect.insert(self.model).values(
+                [{"name": name, "value": value} for name, value in values.items()]
+            )
+            new_value = query.excluded.value
+            if increment:
+                new_value = self.model.value + query.excluded.value
+            query = query.on_conflict_do_update(
+                index_elements=[self.model.name],
+                set_={"value": new_value, "updated_at": func.now()},
+            )
+            await session.execute(query)
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка при обновлении счетчиков {values}: {e}")
+            raise
 
-class UserDAO(BaseDAO):
+
+class CountedDAO(BaseDAO):
+    # DAO, чей count отвечает из счетчиков, если они покрывают фильтр.
+    # Специальные методы записи сдвигают счетчики сами, а общие методы BaseDAO
+    # помечают их устаревшими до следующего точного пересчета
+    counter_names: dict[frozenset, str] = {}
+    # Колонки, изменение которых через update сдвигает счетчики
+    counted_columns: frozenset[str] = frozenset()
+
+    async def _count_from_counters(
+        self, session: AsyncSession, filter_dict: dict
+    ) -> int | None:
+        if (name := self.counter_names.get(frozenset(filter_dict.items()))) is None:
+            return None
+        return await CounterDAO().get_value(session, name)
+
+    def _touches_counters(self, values: BaseModel) -> bool:
+        return not self.counted_columns.isdisjoint(
+            values.model_dump(exclude_unset=True)
+        )
+
+    async def add(self, session: AsyncSession, values: BaseModel):
+        new_instance = await super().add(session, values)
+        await CounterDAO().invalidate(session)
+        return new_instance
+
+    async def add_many(self, session: AsyncSession, values: List[BaseModel]):
+        new_instances = await super().add_many(session, values)
+        if new_instances:
+            await CounterDAO().invalidate(session)
+        return new_instances
+
+    async def update(
+        self, session: AsyncSession, filters: BaseModel, values: BaseModel
+    ):
+        result = await super().update(session, filters, values)
+        if result.rowcount and self._touches_counters(values):
+            await CounterDAO().invalidate(session)
+        return result
+
+    async def delete(self, session: AsyncSession, filters: BaseModel):
+        deleted = await super().delete(session, filters)
+        if deleted:
+            await CounterDAO().invalidate(session)
+        return deleted
+
+    async def bulk_update(self, session: AsyncSession, records: List[BaseModel]):
+        updated_count = await super().bulk_update(session, records)
+        if updated_count and any(self._touches_counters(r) for r in records):
+            await CounterDAO().invalidate(session)
+        return updated_count
+
+
+class UserDAO(CountedDAO):
     model = User
+    counter_names = {frozenset(): USERS_TOTAL}
+    counted_columns = frozenset({"created_at"})
 
     async def register_user(self, session: AsyncSession, values: BaseModel):
         # Регистрация нового пользователя
@@ -18,44 +152,287 @@ class UserDAO(BaseDAO):
             f"Добавление записи {self.model.__name__} с параметрами: {values_dict}"
         )
         try:
-            new_instance = self.model(**values_dict)
+            # created_at задается явно: день счетчика регистраций и день,
+            # по которому его пересчитывает exact_counters, берутся из одного
+            # времени UTC, а не из часов и часового пояса сервера БД
+            created_at = datetime.now(timezone.utc).replace(tzinfo=None)
+            new_instance = self.model(**values_dict, created_at=created_at)
             session.add(new_instance)
             logger.info(f"Запись {self.model.__name__} успешно добавлена.")
             await session.flush()
             profile = Profile(id=new_instance.id)
             session.add(profile)
+            await CounterDAO().increment(
+                session,
+                {USERS_TOTAL: 1, signups_counter(created_at.date()): 1},
+            )
             return new_instance
 
         except SQLAlchemyError as e:
             logger.error(f"Ошибка при добавлении записи: {e}")
             raise
 
+    async def find_auth_row(self, session: AsyncSession, user_id: str) -> Row | None:
+        # Проекция для аутентификации запроса: id, email и is_active профиля
+        # одним запросом, без загрузки ORM-сущностей
+        logger.info(f"Поиск данных аутентификации {self.model.__name__} с ID {user_id}")
+        columns = (self.model.id, self.model.email, Profile.is_active)
+        try:
+            query = (
+                select(*columns)
+                .outerjoin(Profile, Profile.id == self.model.id)
+                .where(self.model.id == user_id)
+            )
+            key = self._flight_key("auth_row", {"id": user_id}, columns)
+            return await self._fetch_one(session, query, columns, key)
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка при поиске данных аутентификации {user_id}: {e}")
+            raise
 
-class ProfileDAO(BaseDAO):
+    async def count_signups(self, session: AsyncSession, day: date) -> int | None:
+        # Число регистраций за день по счетчику
+        return await CounterDAO().get_value(session, signups_counter(day))
+
+    async def exact_counters(self, session: AsyncSession) -> dict[str, int]:
+        # Точный пересчет всех счетчиков пользователей полным сканированием
+        logger.info("Точный пересчет счетчиков пользователей")
+        try:
+            total = await session.scalar(select(func.count(self.model.id)))
+            active = await session.scalar(
+                select(func.count(Profile.id)).where(Profile.is_active.is_(True))
+            )
+            signup_day = func.date(self.model.created_at)
+            signups = await session.execute(
+                select(signup_day, func.count(self.model.id)).group_by(signup_day)
+            )
+            values = {USERS_TOTAL: total, USERS_ACTIVE: active}
+            for day, count in signups.all():
+                # SQLite возвращает дату строкой, PostgreSQL - объектом date
+                day = date.fromisoformat(day) if isinstance(day, str) else day
+                values[signups_counter(day)] = count
+            return values
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка при пересчете счетчиков: {e}")
+            raise
+
+    async def stream_with_profile(
+        self,
+        session: AsyncSession,
+        columns: Sequence[ColumnElement],
+        filters: BaseModel,
+        batch_size: int,
+    ) -> AsyncIterator[Sequence[Row]]:
+        # Потоковое чтение пользователей с профилями порциями по batch_size.
+        # session.stream использует серверный курсор, поэтому память не растет
+        # с размером таблицы
+        filter_dict = filters.model_dump(exclude_none=True)
+        logger.info(
+            f"Потоковая выгрузка {self.model.__name__} по фильтрам: {filter_dict}"
+        )
+        conditions = []
+        if "is_active" in filter_dict:
+            conditions.append(Profile.is_active.is_(filter_dict["is_active"]))
+        if "created_from" in filter_dict:
+            conditions.append(self.model.created_at >= filter_dict["created_from"])
+        if "created_to" in filter_dict:
+            conditions.append(self.model.created_at < filter_dict["created_to"])
+        query = (
+            select(*columns)
+            .select_from(self.model)
+            .join(Profile, Profile.id == self.model.id)
+            .where(*conditions)
+            .order_by(self.model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        try:
+            result = await session.stream(query)
+            async for batch in result.partitions(batch_size):
+                yield batch
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка при потоковой выгрузке: {e}")
+            raise
+
+    async def search(
+        self, session: AsyncSession, query: str, limit: int, offset: int
+    ) -> Sequence[Row]:
+        # Поиск по частичному email, username или телефону с ранжированием.
+        # SQLite - FTS5 (триграммы, bm25), PostgreSQL - pg_trgm (similarity)
+        logger.info(f"Поиск пользователей по строке {query!r}")
+        try:
+            if session.bind.dialect.name == "sqlite":
+                statement = text(
+                    """
+                    SELECT users.id, users.email, profiles.username, profiles.phone_number
+                    FROM users_fts
+                    JOIN users ON users.id = users_fts.user_id
+                    LEFT JOIN profiles ON profiles.id = users.id
+                    WHERE users_fts MATCH :match
+                    ORDER BY users_fts.rank
+                    LIMIT :limit OFFSET :offset
+                    """
+                ).bindparams(
+                    # Строка поиска как фраза FTS5: кавычки внутри удваиваются
+                    match='"' + query.replace('"', '""') + '"',
+                    limit=limit,
+                    offset=offset,
+                )
+            else:
+                # Шаблон целиком в параметре, чтобы планировщик использовал GIN-индекс.
+                # OR по колонкам двух таблиц через LEFT JOIN индекс не использует,
+                # поэтому каждая колонка ищется своим запросом по своему индексу,
+                # а соединяются и ранжируются только найденные id
+                pattern = "%" + re.sub(r"([/%_])", r"/\1", query) + "%"
+                matched = union(
+                    select(self.model.id).where(
+                        self.model.email.ilike(pattern, escape="/")
+                    ),
+                    select(Profile.id).where(
+                        Profile.username.ilike(pattern, escape="/")
+                    ),
+                    select(Profile.id).where(
+                        Profile.phone_number.ilike(pattern, escape="/")
+                    ),
+                ).subquery()
+                rank = func.greatest(
+                    func.similarity(self.model.email, query),
+                    func.coalesce(func.similarity(Profile.username, query), 0),
+                    func.coalesce(func.similarity(Profile.phone_number, query), 0),
+                )
+                statement = (
+                    select(
+                        self.model.id,
+                        self.model.email,
+                        Profile.username,
+                        Profile.phone_number,
+                    )
+                    .select_from(matched)
+                    .join(self.model, self.model.id == matched.c.id)
+                    .outerjoin(Profile, Profile.id == self.model.id)
+                    .order_by(rank.desc(), self.model.id)
+                    .limit(limit)
+                    .offset(offset)
+                )
+            return (await session.execute(statement)).all()
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка при поиске пользователей: {e}")
+            raise
+
+    async def purge_inactive_batch(
+        self, session: AsyncSession, created_before: datetime, after_id: str, limit: int
+    ) -> tuple[str | None, list[str]]:
+        # Удаление порции неактивированных аккаунтов старше created_before.
+        # Keyset-итерация по id: порция берется строго после after_id,
+        # поэтому каждый шаг использует индекс первичного ключа.
+        # Возвращает последний просмотренный id (None, если порций больше нет)
+        # и id удаленных аккаунтов.
+        logger.info(
+            f"Удаление неактивированных аккаунтов после ID {after_id!r}, порция {limit}"
+        )
+        try:
+            candidates = (
+                select(self.model.id)
+                .join(Profile, Profile.id == self.model.id)
+                .where(
+                    self.model.id > after_id,
+                    self.model.created_at < created_before,
+                    Profile.is_active.is_(False),
+                )
+                .order_by(self.model.id)
+                .limit(limit)
+            )
+            ids = (await session.execute(candidates)).scalars().all()
+            if not ids:
+                return None, []
+            # Повторная проверка is_active защищает от активации между выборкой и удалением
+            result = await session.execute(
+                delete(Profile)
+                .where(Profile.id.in_(ids), Profile.is_active.is_(False))
+                .returning(Profile.id)
+                .execution_options(synchronize_session=False)
+            )
+            purged = result.scalars().all()
+            if purged:
+                result = await session.execute(
+                    delete(self.model)
+                    .where(self.model.id.in_(purged))
+                    .returning(self.model.created_at)
+                    .execution_options(synchronize_session=False)
+                )
+                deltas = {USERS_TOTAL: -len(purged)}
+                for created_at in result.scalars():
+                    name = signups_counter(created_at.date())
+                    deltas[name] = deltas.get(name, 0) - 1
+                await CounterDAO().increment(session, deltas)
+            return ids[-1], purged
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка при удалении неактивированных аккаунтов: {e}")
+            raise
+
+
+class ProfileDAO(CountedDAO):
     model = Profile
+    counter_names = {
+        frozenset(): USERS_TOTAL,
+        frozenset({("is_active", True)}): USERS_ACTIVE,
+    }
+    counted_columns = frozenset({"is_active"})
 
     async def update_profile(
         self, session: AsyncSession, filters: BaseModel, values: BaseModel
     ):
-        # Обновление профиля пользователя
+        # Обновление профиля пользователя одним UPDATE ... RETURNING
         filter_dict = filters.model_dump(exclude_unset=True)
         values_dict = values.model_dump(exclude_unset=True)
         logger.info(
             f"Обновление профиля {self.model.__name__} по фильтру: {filter_dict} с параметрами: {values_dict}"
         )
         try:
+            if (is_active := values_dict.pop("is_active", None)) is not None:
+                await self._set_active(session, filter_dict, is_active)
             query = (
                 update(self.model)
                 .where(*[getattr(self.model, k) == v for k, v in filter_dict.items()])
                 .values(**values_dict)
-                .execution_options(synchronize_session="fetch")
+                .returning(*self._profile_columns())
+                .execution_options(synchronize_session=False)
             )
             result = await session.execute(query)
-            await session.flush()
-            user = await UserDAO().find_one_or_none_by_id(
-                session, data_id=filter_dict["id"]
-            )
-            return user
+            return result.mappings().one_or_none()
         except SQLAlchemyError as e:
             logger.error(f"Ошибка при обновлении профиля: {e}")
             raise
+
+    async def activate(self, session: AsyncSession, filters: BaseModel):
+        # Активация профиля: атомарный UPDATE только для неактивных профилей
+        filter_dict = filters.model_dump(exclude_unset=True)
+        logger.info(f"Активация профиля {self.model.__name__} по фильтру: {filter_dict}")
+        try:
+            return await self._set_active(session, filter_dict, True)
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка при активации профиля: {e}")
+            raise
+
+    async def _set_active(self, session: AsyncSession, filter_dict: dict, value: bool):
+        # Смена is_active только при реальном изменении, со сдвигом счетчика активных
+        query = (
+            update(self.model)
+            .where(*[getattr(self.model, k) == v for k, v in filter_dict.items()])
+            .where(self.model.is_active.is_(not value))
+            .values(is_active=value)
+            .returning(self.model.id)
+            .execution_options(synchronize_session=False)
+        )
+        changed_id = (await session.execute(query)).scalar_one_or_none()
+        if changed_id is not None:
+            await CounterDAO().increment(session, {USERS_ACTIVE: 1 if value else -1})
+        return changed_id
+
+    def _profile_columns(self):
+        # Колонки профиля, возвращаемые клиенту
+        return (
+            self.model.username,
+            self.model.bio,
+            self.model.is_active,
+            self.model.birthday,
+            self.model.phone_number,
+        )
@@ -1,17 +1,63 @@
+from contextlib import asynccontextmanager
 from datetime import datetime
 
-from sqlalchemy import TIMESTAMP, func
+from sqlalchemy import TIMESTAMP, event, func
 from sqlalchemy.ext.asyncio import (
     AsyncAttrs,
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
-from sqlalchemy.orm import DeclarativeBase, Mapped, declared_attr, mapped_column
+from sqlalchemy.orm import (
+    DeclarativeBase,
+    Mapped,
+    ORMExecuteState,
+    Session,
+    declared_attr,
+    mapped_column,
+)
+from sqlalchemy.pool import NullPool
+
+from ..config import settings
+from .search import register_search_ddl
+from .sqlite_tuning import configure_connections, configure_transactions
 
 engine = create_async_engine(url="sqlite+aiosqlite:///AuthJWT.sqlite3")
 async_session_maker = async_sessionmaker(engine, class_=AsyncSession)
 
+# В режиме высокой конкурентности SQLite основной движок - пул read-only
+# соединений, а записи идут через отдельный движок с единственным соединением
+sqlite_concurrency = settings.sqlite.enabled and engine.dialect.name == "sqlite"
+writer_engine: AsyncEngine | None = None
+if sqlite_concurrency:
+    configure_connections(engine.sync_engine, settings.sqlite, read_only=True)
+    writer_engine = create_async_engine(engine.url, pool_size=1, max_overflow=0)
+    configure_connections(writer_engine.sync_engine, settings.sqlite)
+    configure_transactions(writer_engine.sync_engine)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_write_statement(orm_execute_state: ORMExecuteState) -> None:
+    # Помечаем сессию, если в ней выполнялся INSERT/UPDATE/DELETE
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush(session: Session, flush_context) -> None:
+    session.info["has_writes"] = True
+
+
+def has_writes(session: AsyncSession) -> bool:
+    """Были ли в сессии изменения, требующие коммита."""
+    return bool(
+        session.info.get("has_writes")
+        or session.new
+        or session.dirty
+        or session.deleted
+    )
+
 
 class Base(AsyncAttrs, DeclarativeBase):
     __abstract__ = True
@@ -26,6 +72,46 @@ class Base(AsyncAttrs, DeclarativeBase):
         return cls.__name__.lower() + "s"
 
 
+register_search_ddl(Base.metadata)
+
+
+def snapshot_read_options(bind: AsyncEngine) -> dict:
+    """
+    Опции соединения для транзакции, все запросы которой читают один снимок.
+    В PostgreSQL по умолчанию READ COMMITTED берет новый снимок на каждый запрос,
+    в SQLite транзакция открывается отложенным BEGIN без блокировки записи.
+    """
+    if bind.dialect.name == "postgresql":
+        return {"isolation_level": "REPEATABLE READ"}
+    return {"sqlite_begin": "DEFERRED"}
+
+
 async def create_tables():
-    async with engine.begin() as conn:
+    async with (writer_engine or engine).begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+
+
+async def dispose_engine():
+    await engine.dispose()
+    if writer_engine is not None:
+        await writer_engine.dispose()
+
+
+@asynccontextmanager
+async def standalone_session_maker():
+    """
+    Фабрика сессий на отдельном движке без пула соединений.
+    Для задач Celery, которые выполняются в собственном событийном цикле
+    и не могут использовать соединения основного движка. Транзакции SQLite
+    открываются явно, чтобы длинные чтения задач шли в отложенной транзакции
+    (snapshot_read_options), а блокировку записи брали только короткие записи.
+    """
+    task_engine = create_async_engine(engine.url, poolclass=NullPool)
+    if sqlite_concurrency:
+        configure_connections(task_engine.sync_engine, settings.sqlite)
+    if task_engine.dialect.name == "sqlite":
+        configure_transactions(task_engine.sync_engine)
+    try:
+        yield async_sessionmaker(task_engine, class_=AsyncSession)
+    finally:
+        await task_engine.dispose()
@@ -0,0 +1,31 @@
+import asyncio
+
+from loguru import logger
+
+from .counters import recount_counters
+from .database import create_tables, dispose_engine, standalone_session_maker
+
+
+async def migrate() -> None:
+    """
+    Создание таблиц, индексов и триггеров поиска и засев счетчиков.
+    Выполняется один раз при развертывании, а не при каждом старте воркера.
+    """
+    try:
+        logger.info("Создание таблиц базы данных")
+        await create_tables()
+        logger.info("Таблицы базы данных созданы")
+        # Без засеянных счетчиков count сканирует таблицы до первого
+        # периодического пересчета
+        async with standalone_session_maker() as session_maker:
+            await recount_counters(session_maker)
+    finally:
+        await dispose_engine()
+
+
+def main() -> None:
+    asyncio.run(migrate())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+from sqlalchemy import BigInteger, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .database import Base
+
+
+class Counter(Base):
+    # Инкрементально поддерживаемые счетчики вместо COUNT(*) по большим таблицам
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    value: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
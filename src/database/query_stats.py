@@ -0,0 +1,86 @@
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from .database import engine, writer_engine
+
+
+class QueryStats:
+    """Статистика SQL-запросов одного HTTP-запроса."""
+
+    __slots__ = ("count", "total_time", "statements", "budget")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_time = 0.0  # Секунд в БД
+        self.statements: Counter[str] = Counter()
+        self.budget: int | None = None  # Максимум запросов, объявленный маршрутом
+
+    def repeated(self, threshold: int) -> dict[str, int]:
+        """Одинаковые запросы, выполненные не меньше threshold раз (признак N+1)."""
+        return {sql: n for sql, n in self.statements.items() if n >= threshold}
+
+    @property
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.count > self.budget
+
+
+current_query_stats: ContextVar[QueryStats | None] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Маршрут выполнил больше запросов, чем объявил в бюджете."""
+
+
+class QueryBudget:
+    """
+    Зависимость маршрута, объявляющая максимальное число SQL-запросов.
+    Пример: @router.get(..., dependencies=[Depends(QueryBudget(1))])
+    """
+
+    def __init__(self, max_queries: int) -> None:
+        self.max_queries = max_queries
+
+    def __call__(self) -> None:
+        if (stats := current_query_stats.get()) is not None:
+            stats.budget = self.max_queries
+
+
+# Управление транзакциями (явный BEGIN и точки сохранения писателя SQLite)
+# не считается запросами маршрута
+TRANSACTION_CONTROL = ("BEGIN", "SAVEPOINT", "RELEASE", "ROLLBACK", "COMMIT")
+
+
+def _is_counted(statement: str) -> bool:
+    return not statement.lstrip().upper().startswith(TRANSACTION_CONTROL)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_query_stats.get() is not None and _is_counted(statement):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if (stats := current_query_stats.get()) is None or not _is_counted(statement):
+        return
+    stats.count += 1
+    stats.total_time += time.perf_counter() - conn.info["query_start"].pop()
+    stats.statements[statement] += 1
+
+
+def _handle_error(exception_context) -> None:
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+# Запросы писателя SQLite тоже учитываются: его транзакции выполняются
+# в контексте HTTP-запроса
+for _engine in filter(None, (engine, writer_engine)):
+    event.listen(_engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(_engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(_engine.sync_engine, "handle_error", _handle_error)
@@ -0,0 +1,118 @@
+from sqlalchemy import DDL, MetaData, event
+
+# Полнотекстовый поиск пользователей по частичному email, username и телефону.
+# SQLite: FTS5-таблица с триграммным токенайзером, синхронизация триггерами.
+# users.id - строковый ключ, а rowid таблицы без INTEGER PRIMARY KEY может
+# измениться после VACUUM или выгрузки и загрузки базы, поэтому FTS-строка
+# хранит users.id в неиндексируемой колонке, а ее rowid берется из таблицы
+# users_fts_docs с INTEGER PRIMARY KEY и уникальным индексом по users.id.
+# PostgreSQL: триграммные GIN-индексы pg_trgm, которые ускоряют ILIKE '%...%'.
+
+# rowid FTS-строки пользователя по индексу users_fts_docs
+_DOC_ID = "(SELECT doc_id FROM users_fts_docs WHERE user_id = {user_id})"
+
+# Индексация пользователей, которых еще нет в индексе: при создании индекса
+# для существующей базы и после массовой загрузки без триггеров
+SQLITE_SEARCH_BACKFILL = [
+    """
+    INSERT INTO users_fts_docs (user_id)
+    SELECT users.id FROM users
+    LEFT JOIN users_fts_docs ON users_fts_docs.user_id = users.id
+    WHERE users_fts_docs.user_id IS NULL
+    """,
+    """
+    INSERT INTO users_fts (rowid, user_id, email, username, phone_number)
+    SELECT users_fts_docs.doc_id, users.id, users.email,
+           profiles.username, profiles.phone_number
+    FROM users_fts_docs
+    JOIN users ON users.id = users_fts_docs.user_id
+    LEFT JOIN profiles ON profiles.id = users.id
+    WHERE users_fts_docs.doc_id > (SELECT coalesce(max(rowid), 0) FROM users_fts)
+    """,
+]
+
+SQLITE_SEARCH_TRIGGERS = {
+    "users_fts_users_insert": f"""
+    CREATE TRIGGER IF NOT EXISTS users_fts_users_insert AFTER INSERT ON users
+    BEGIN
+        INSERT INTO users_fts_docs (user_id) VALUES (new.id);
+        INSERT INTO users_fts (rowid, user_id, email)
+        VALUES ({_DOC_ID.format(user_id="new.id")}, new.id, new.email);
+    END
+    """,
+    "users_fts_users_update": f"""
+    CREATE TRIGGER IF NOT EXISTS users_fts_users_update
+    AFTER UPDATE OF email ON users
+    BEGIN
+        UPDATE users_fts SET email = new.email
+        WHERE rowid = {_DOC_ID.format(user_id="new.id")};
+    END
+    """,
+    "users_fts_users_delete": f"""
+    CREATE TRIGGER IF NOT EXISTS users_fts_users_delete AFTER DELETE ON users
+    BEGIN
+        DELETE FROM users_fts WHERE rowid = {_DOC_ID.format(user_id="old.id")};
+        DELETE FROM users_fts_docs WHERE user_id = old.id;
+    END
+    """,
+    "users_fts_profiles_insert": f"""
+    CREATE TRIGGER IF NOT EXISTS users_fts_profiles_insert AFTER INSERT ON profiles
+    BEGIN
+        UPDATE users_fts
+        SET username = new.username, phone_number = new.phone_number
+        WHERE rowid = {_DOC_ID.format(user_id="new.id")};
+    END
+    """,
+    "users_fts_profiles_update": f"""
+    CREATE TRIGGER IF NOT EXISTS users_fts_profiles_update
+    AFTER UPDATE OF username, phone_number ON profiles
+    BEGIN
+        UPDATE users_fts
+        SET username = new.username, phone_number = new.phone_number
+        WHERE rowid = {_DOC_ID.format(user_id="new.id")};
+    END
+    """,
+}
+
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS users_fts_docs (
+        doc_id INTEGER PRIMARY KEY,
+        user_id TEXT NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS users_fts
+    USING fts5(user_id UNINDEXED, email, username, phone_number, tokenize='trigram')
+    """,
+    *SQLITE_SEARCH_BACKFILL,
+    *SQLITE_SEARCH_TRIGGERS.values(),
+]
+
+POSTGRESQL_SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE INDEX IF NOT EXISTS ix_users_email_trgm
+    ON users USING gin (email gin_trgm_ops)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_profiles_username_trgm
+    ON profiles USING gin (username gin_trgm_ops)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_profiles_phone_number_trgm
+    ON profiles USING gin (phone_number gin_trgm_ops)
+    """,
+]
+
+
+def register_search_ddl(metadata: MetaData) -> None:
+    """Создание поискового индекса вместе с таблицами metadata.create_all."""
+    for statement in SQLITE_SEARCH_DDL:
+        event.listen(
+            metadata, "after_create", DDL(statement).execute_if(dialect="sqlite")
+        )
+    for statement in POSTGRESQL_SEARCH_DDL:
+        event.listen(
+            metadata, "after_create", DDL(statement).execute_if(dialect="postgresql")
+        )
@@ -0,0 +1,68 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class _LeaderCancelled(Exception):
+    # Первый вызов отменен до результата; ожидающие повторяют попытку сами
+    pass
+
+
+class SingleFlight:
+    """
+    Объединение одновременных одинаковых вызовов в рамках одного воркера.
+    Первый вызов с ключом (лидер) выполняет func сам, в своем контексте,
+    а одновременные вызовы с тем же ключом ждут его результат. Пока
+    одинаковых вызовов нет, лишних задач и ожиданий не создается.
+    Исключение лидера получают все вызовы; если лидер отменен, ожидающие
+    повторяют вызов, и один из них становится новым лидером.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Future] = {}
+        self.executed = 0  # Реально выполненные вызовы
+        self.coalesced = 0  # Вызовы, дождавшиеся чужого результата
+
+    async def do(
+        self,
+        key: Hashable,
+        func: Callable[[], Awaitable[Any]],
+        follow: Callable[[Any], Awaitable[Any]] | None = None,
+    ) -> Any:
+        # follow - преобразование результата лидера для ожидающего вызова
+        while (future := self._calls.get(key)) is not None:
+            try:
+                # shield: отмена ожидающего не должна отменять общий результат
+                result = await asyncio.shield(future)
+            except _LeaderCancelled:
+                continue
+            self.coalesced += 1
+            return await follow(result) if follow is not None else result
+
+        self.executed += 1
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.set_exception(_LeaderCancelled())
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+            # Забираем исключение, даже если ожидающих не было
+            future.exception()
+
+    def stats(self) -> dict:
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+        }
+
+
+single_flight = SingleFlight()
@@ -0,0 +1,48 @@
+from sqlalchemy import Engine, event
+
+from ..config import SqliteConcurrency
+
+
+def configure_connections(
+    sync_engine: Engine, config: SqliteConcurrency, read_only: bool = False
+) -> None:
+    """
+    Настройки, выполняемые на каждом новом соединении SQLite.
+    WAL позволяет читателям работать параллельно с писателем, synchronous=NORMAL
+    в WAL выполняет fsync только при checkpoint, busy_timeout заменяет мгновенную
+    ошибку "database is locked" ожиданием блокировки.
+    """
+
+    @event.listens_for(sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        # busy_timeout первым: переключение в WAL тоже может ждать блокировку
+        cursor.execute(f"PRAGMA busy_timeout = {config.busy_timeout_ms}")
+        cursor.execute("PRAGMA journal_mode = WAL")
+        cursor.execute(f"PRAGMA synchronous = {config.synchronous}")
+        cursor.execute(f"PRAGMA mmap_size = {config.mmap_size}")
+        # Отрицательное значение cache_size задается в КиБ, а не в страницах
+        cursor.execute(f"PRAGMA cache_size = -{config.cache_size_kib}")
+        if read_only:
+            cursor.execute("PRAGMA query_only = ON")
+        cursor.close()
+
+
+def configure_transactions(sync_engine: Engine) -> None:
+    """
+    Явное управление транзакциями SQLite.
+    Драйвер sqlite3 сам открывает транзакции и не поддерживает SAVEPOINT,
+    поэтому транзакцию начинает SQLAlchemy. По умолчанию BEGIN IMMEDIATE берет
+    блокировку записи сразу, и транзакция не падает при попытке повысить
+    блокировку. Транзакции только для чтения открываются с опцией выполнения
+    sqlite_begin="DEFERRED": они читают один снимок и не держат блокировку записи.
+    """
+
+    @event.listens_for(sync_engine, "connect")
+    def _disable_driver_transactions(dbapi_connection, connection_record) -> None:
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(sync_engine, "begin")
+    def _begin(conn) -> None:
+        mode = conn.get_execution_options().get("sqlite_begin", "IMMEDIATE")
+        conn.exec_driver_sql(f"BEGIN {mode}")
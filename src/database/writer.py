@@ -0,0 +1,124 @@
+import asyncio
+import contextvars
+from typing import Awaitable, Callable, TypeVar
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from ..config import SqliteConcurrency, settings
+from .database import writer_engine
+
+T = TypeVar("T")
+WriteWork = Callable[[AsyncSession], Awaitable[T]]
+
+
+class SqliteWriter:
+    """
+    Единственный писатель SQLite с групповым коммитом.
+    Транзакции записи ставятся в очередь; задача-писатель забирает накопившиеся
+    (не больше max_batch), выполняет каждую в своей точке сохранения внутри
+    общей транзакции и коммитит их одним COMMIT - один fsync на пакет.
+    Ошибка транзакции откатывает только ее точку сохранения. Вызывающий
+    получает результат после коммита, то есть после сохранения данных.
+    """
+
+    def __init__(self, engine: AsyncEngine, config: SqliteConcurrency | None = None):
+        self.config = config or settings.sqlite
+        # Объекты, возвращенные транзакциями, читаются уже после коммита
+        self._session_maker = async_sessionmaker(
+            engine, class_=AsyncSession, expire_on_commit=False
+        )
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self.batches = 0
+        self.writes = 0
+
+    async def submit(self, work: WriteWork[T]) -> T:
+        # Задача-писатель запускается при первой записи в текущем цикле событий
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        # Транзакция выполняется в контексте вызывающего, чтобы учет SQL-запросов
+        # и бюджеты маршрутов видели ее запросы
+        self._queue.put_nowait((work, contextvars.copy_context(), future))
+        return await future
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch = [await self._queue.get()]
+            if self.config.commit_delay > 0:
+                await asyncio.sleep(self.config.commit_delay)
+            while len(batch) < self.config.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            # None - сигнал остановки от close()
+            if None in batch:
+                stopping = True
+                batch = [job for job in batch if job is not None]
+            if batch:
+                await self._commit(batch)
+
+    async def _commit(self, batch: list) -> None:
+        outcomes = []
+        try:
+            async with self._session_maker() as session:
+                for work, context, future in batch:
+                    try:
+                        result = await asyncio.create_task(
+                            self._in_savepoint(session, work), context=context
+                        )
+                        outcomes.append((future, result, None))
+                    except Exception as e:
+                        outcomes.append((future, None, e))
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Ошибка группового коммита {len(batch)} транзакций: {e}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.batches += 1
+        self.writes += len(batch)
+        for future, result, error in outcomes:
+            # Вызывающий мог быть отменен, пока ждал коммита
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    @staticmethod
+    async def _in_savepoint(session: AsyncSession, work: WriteWork[T]) -> T:
+        async with session.begin_nested():
+            return await work(session)
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "batches": self.batches,
+            "writes": self.writes,
+            "avg_batch": round(self.writes / self.batches, 2) if self.batches else 0,
+        }
+
+    async def close(self) -> None:
+        # Дожидаемся записи уже поставленных в очередь транзакций
+        if self._task is not None and not self._task.done():
+            self._queue.put_nowait(None)
+            await self._task
+        self._task = None
+
+
+sqlite_writer = SqliteWriter(writer_engine) if writer_engine is not None else None
+
+
+async def run_write(session: AsyncSession, work: WriteWork[T]) -> T:
+    """
+    Выполнение транзакции записи.
+    В режиме высокой конкурентности SQLite она уходит единственному писателю
+    и возвращается после группового коммита. Иначе выполняется в сессии
+    запроса, которую коммитит get_session.
+    """
+    if sqlite_writer is None:
+        return await work(session)
+    return await sqlite_writer.submit(work)
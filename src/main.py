@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 from pathlib import Path
 
@@ -5,24 +6,50 @@ import uvicorn
 from fastapi import FastAPI, Request, status
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from loguru import logger
 
+from src.auth.introspection import token_introspector
 from src.auth.router import app as auth_router
-from src.database.database import create_tables
+from src.celery_app.dispatch import close_connections
+from src.config import settings
+from src.database.database import create_tables, dispose_engine
+from src.database.single_flight import single_flight
+from src.database.writer import sqlite_writer
+from src.middleware.admission import AdmissionControlMiddleware
+from src.middleware.query_stats import QueryStatsMiddleware
 from src.users.router import router as user_router
+from src.warmup import warm_up
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Starting application...")
-    logger.info(f"Creating database tables")
-    await create_tables()
-    logger.info("Database tables created successfully")
+    if settings.DB_CREATE_ON_STARTUP:
+        logger.info(f"Creating database tables")
+        await create_tables()
+        logger.info("Database tables created successfully")
+    # Прогрев идет в фоне: сервер уже принимает соединения,
+    # но /health/ready отвечает 503, пока прогрев не завершится
+    app.state.ready = not settings.warmup.enabled
+    warmup_task = None
+    if settings.warmup.enabled:
+        warmup_task = asyncio.create_task(warm_up(app, templates))
     yield
     logger.info("Stopping application...")
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    logger.info(f"Single-flight DAO stats: {single_flight.stats()}")
+    logger.info(f"Token introspection stats: {token_introspector.stats()}")
+    token_introspector.close()
+    if sqlite_writer is not None:
+        await sqlite_writer.close()
+        logger.info(f"SQLite writer stats: {sqlite_writer.stats()}")
+    await dispose_engine()
+    close_connections()
+    logger.info("Database engine and Celery connections closed")
 
 
 templates = Jinja2Templates(directory=Path(__file__).parent.parent / "templates")
@@ -36,9 +63,40 @@ app.include_router(user_router)
 # Маршрут для отображения главной страницы
 @app.get("/", include_in_schema=False)
 async def index(request: Request):
+    if (html := getattr(request.app.state, "index_html", None)) is not None:
+        return HTMLResponse(html)
     return templates.TemplateResponse("index.html", {"request": request})
 
 
+@app.get("/health/live", include_in_schema=False)
+async def liveness():
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", include_in_schema=False)
+async def readiness(request: Request):
+    if not request.app.state.ready:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "warming up"},
+        )
+    return {"status": "ready"}
+
+
+# Учет SQL-запросов на запрос и бюджеты маршрутов
+app.add_middleware(QueryStatsMiddleware)
+
+# Профилирование запросов по требованию
+if settings.profiling.enabled:
+    # pyinstrument импортируется только при включенном профилировании
+    from src.middleware.profiling import ProfilingMiddleware
+
+    app.add_middleware(ProfilingMiddleware)
+
+# Контроль допуска и сброс нагрузки. Добавляется до CORS, чтобы ответы 503
+# тоже получали CORS-заголовки
+app.add_middleware(AdmissionControlMiddleware)
+
 # Настройка CORS
 app.add_middleware(
     CORSMiddleware,
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import time
+from collections import deque
+
+from loguru import logger
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..config import AdmissionControl, RouteClassLimit, settings
+
+
+class AdaptiveLimiter:
+    """
+    Ограничитель одновременных запросов с адаптивным лимитом (AIMD).
+    Если задержка выше целевой, лимит уменьшается мультипликативно,
+    если лимит исчерпан и задержка в норме - увеличивается аддитивно.
+    Запросы сверх лимита ждут в ограниченной очереди не дольше queue_timeout.
+    """
+
+    def __init__(self, name: str, config: RouteClassLimit) -> None:
+        self.name = name
+        self.config = config
+        self.limit = float(config.initial_limit)
+        self.in_flight = 0
+        self.shed = 0  # Число отклоненных запросов
+        self._waiters: deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> bool:
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return True
+        if len(self._waiters) >= self.config.queue_size:
+            self.shed += 1
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout=self.config.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            self.shed += 1
+            self._give_back(waiter)
+            return False
+        except asyncio.CancelledError:
+            self._give_back(waiter)
+            raise
+
+    def release(self, latency: float | None) -> None:
+        self.in_flight -= 1
+        if latency is not None:
+            self._adjust(latency)
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(True)
+
+    def _adjust(self, latency: float) -> None:
+        config = self.config
+        if latency > config.target_latency:
+            self.limit = max(float(config.min_limit), self.limit * 0.9)
+        elif self.in_flight + 1 >= int(self.limit):
+            self.limit = min(float(config.max_limit), self.limit + 1 / self.limit)
+
+    def _give_back(self, waiter: asyncio.Future) -> None:
+        # Ожидание прервано: убираем из очереди или возвращаем уже выданное место
+        if waiter.done() and not waiter.cancelled():
+            self.release(latency=None)
+        elif waiter in self._waiters:
+            self._waiters.remove(waiter)
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware контроля допуска: отдельные адаптивные лимиты для дорогих
+    маршрутов аутентификации и для остальных запросов. При перегрузке запрос
+    сразу получает 503 с заголовком Retry-After вместо бесконечного ожидания.
+    Маршруты из exempt_paths (пробы здоровья) проходят без ограничений.
+    """
+
+    def __init__(self, app: ASGIApp, config: AdmissionControl | None = None) -> None:
+        self.app = app
+        self.config = config or settings.admission
+        self.auth_limiter = AdaptiveLimiter("auth", self.config.auth)
+        self.default_limiter = AdaptiveLimiter("default", self.config.default)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not self.config.enabled
+            or scope["path"] in self.config.exempt_paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        limiter = (
+            self.auth_limiter
+            if scope["path"] in self.config.auth_paths
+            else self.default_limiter
+        )
+        if not await limiter.acquire():
+            logger.warning(
+                f"Запрос {scope['path']} отклонен: перегрузка ({limiter.name}, "
+                f"лимит {int(limiter.limit)}, в работе {limiter.in_flight})"
+            )
+            await self._reject(send)
+            return
+
+        # Задержка для адаптации лимита - время до начала ответа: длинное тело
+        # потоковой выгрузки не должно считаться медленным запросом и снижать
+        # лимит для остального трафика. Место в лимите занято до конца ответа
+        start = time.perf_counter()
+        latency = None
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal latency
+            if message["type"] == "http.response.start":
+                latency = time.perf_counter() - start
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            limiter.release(latency)
+
+    async def _reject(self, send: Send) -> None:
+        body = json.dumps(
+            {"detail": "Сервис перегружен, повторите запрос позже"},
+            ensure_ascii=False,
+        ).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(self.config.retry_after).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
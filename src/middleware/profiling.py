@@ -0,0 +1,114 @@
+import hmac
+import os
+import random
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from loguru import logger
+from pyinstrument import Profiler
+from pyinstrument.frame import Frame
+from pyinstrument.renderers import SpeedscopeRenderer
+from pyinstrument.session import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from ..config import Profiling, settings
+
+PROFILE_HEADER = b"x-profile-token"
+
+
+class ProfilingMiddleware:
+    """
+    Профилирование запросов сэмплирующим профайлером по требованию.
+    Полный профиль (формат speedscope) пишется для запросов с верным заголовком
+    X-Profile-Token и для доли sample_rate случайных запросов. В непрерывном
+    режиме доля continuous_rate запросов агрегируется в горячие стеки по
+    маршрутам и периодически сбрасывается в файл формата collapsed/folded
+    для flamegraph.pl и speedscope.
+    """
+
+    def __init__(self, app: ASGIApp, config: Profiling | None = None) -> None:
+        self.app = app
+        self.config = config or settings.profiling
+        self.config.output_dir.mkdir(parents=True, exist_ok=True)
+        # Маршрут -> стек (кортеж кадров) -> собственное время в микросекундах
+        self._hot_stacks: defaultdict[str, Counter] = defaultdict(Counter)
+        self._last_flush = time.monotonic()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not (mode := self._select_mode(scope)):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = Profiler(interval=self.config.interval, async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            session = profiler.stop()
+            route = self._route_name(scope)
+            if mode == "request":
+                await run_in_threadpool(self._write_profile, session, route)
+            else:
+                self._aggregate(session, route)
+                now = time.monotonic()
+                if now - self._last_flush >= self.config.continuous_flush_seconds:
+                    self._last_flush = now
+                    await run_in_threadpool(self._write_hot_stacks, self._folded())
+
+    def _select_mode(self, scope: Scope) -> str | None:
+        token = self.config.token
+        if token:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER and hmac.compare_digest(
+                    value, token.encode()
+                ):
+                    return "request"
+        if random.random() < self.config.sample_rate:
+            return "request"
+        if random.random() < self.config.continuous_rate:
+            return "continuous"
+        return None
+
+    @staticmethod
+    def _route_name(scope: Scope) -> str:
+        # Шаблон маршрута доступен после того, как роутер сопоставил запрос
+        route = scope.get("route")
+        path = getattr(route, "path", scope["path"])
+        return f"{scope['method']} {path}"
+
+    def _write_profile(self, session: Session, route: str) -> None:
+        slug = route.replace(" ", "_").replace("/", "_").strip("_")
+        name = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{slug}.speedscope.json"
+        path = self.config.output_dir / name
+        path.write_text(SpeedscopeRenderer().render(session))
+        logger.info(
+            f"Профиль запроса {route} ({session.duration * 1000:.1f} мс) записан в {path}"
+        )
+
+    def _aggregate(self, session: Session, route: str) -> None:
+        if (root := session.root_frame()) is None:
+            return
+        stacks = self._hot_stacks[route]
+        pending: list[tuple[Frame, tuple[str, ...]]] = [(root, ())]
+        while pending:
+            frame, parent_stack = pending.pop()
+            stack = parent_stack + (f"{frame.function} ({frame.file_path_short})",)
+            self_time = frame.time - sum(child.time for child in frame.children)
+            if self_time > 0:
+                stacks[stack] += int(self_time * 1_000_000)
+            pending.extend((child, stack) for child in frame.children)
+
+    def _folded(self) -> str:
+        # Снимок агрегированных стеков, снимается в потоке событийного цикла
+        return "".join(
+            ";".join((route, *stack)) + f" {weight}\n"
+            for route, stacks in self._hot_stacks.items()
+            for stack, weight in stacks.items()
+        )
+
+    def _write_hot_stacks(self, folded: str) -> None:
+        path = self.config.output_dir / f"hot-stacks-{os.getpid()}.folded"
+        path.write_text(folded)
+        logger.info(f"Горячие стеки записаны в {path}")
@@ -0,0 +1,62 @@
+from loguru import logger
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..config import SqlStats, settings
+from ..database.query_stats import QueryBudgetExceeded, QueryStats, current_query_stats
+
+
+class QueryStatsMiddleware:
+    """
+    Подсчет SQL-запросов и времени в БД на каждый HTTP-запрос.
+    Итоги пишутся в лог, в режиме DEBUG также в заголовки X-DB-Query-Count
+    и X-DB-Time-Ms. Повторяющиеся одинаковые запросы помечаются как N+1,
+    превышение бюджета маршрута (QueryBudget) логируется, а при strict_budget
+    приводит к ошибке, чтобы тесты падали.
+    """
+
+    def __init__(self, app: ASGIApp, config: SqlStats | None = None) -> None:
+        self.app = app
+        self.config = config or settings.sql_stats
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.config.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start" and settings.DEBUG:
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"x-db-query-count", str(stats.count).encode()),
+                    (b"x-db-time-ms", f"{stats.total_time * 1000:.2f}".encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            current_query_stats.reset(token)
+        self._report(scope, stats)
+
+    def _report(self, scope: Scope, stats: QueryStats) -> None:
+        route = f"{scope['method']} {scope['path']}"
+        logger.bind(
+            db_query_count=stats.count, db_time_ms=round(stats.total_time * 1000, 2)
+        ).info(
+            f"{route}: {stats.count} SQL-запросов, {stats.total_time * 1000:.2f} мс в БД"
+        )
+        for sql, times in stats.repeated(self.config.n_plus_one_threshold).items():
+            logger.warning(
+                f"{route}: возможный N+1, запрос выполнен {times} раз: {sql[:200]}"
+            )
+        if stats.over_budget:
+            message = (
+                f"{route}: превышен бюджет SQL-запросов "
+                f"({stats.count} > {stats.budget})"
+            )
+            logger.warning(message)
+            if self.config.strict_budget:
+                raise QueryBudgetExceeded(message)
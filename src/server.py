@@ -0,0 +1,62 @@
+import random
+import socket
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+from src.config import settings
+
+
+class JitteredServer(uvicorn.Server):
+    """
+    Сервер uvicorn со случайной добавкой к limit_max_requests.
+    Ядро распределяет запросы между воркерами равномерно, и с одинаковым
+    лимитом все воркеры перезапускались бы почти одновременно.
+    """
+
+    def __init__(self, config: uvicorn.Config, max_requests_jitter: int) -> None:
+        super().__init__(config)
+        self.max_requests_jitter = max_requests_jitter
+
+    def run(self, sockets: list[socket.socket] | None = None) -> None:
+        # Выполняется уже в процессе воркера, поэтому у каждого воркера
+        # (и у каждого перезапущенного) своя добавка
+        if self.config.limit_max_requests is not None and self.max_requests_jitter > 0:
+            self.config.limit_max_requests += random.randint(
+                0, self.max_requests_jitter
+            )
+        super().run(sockets)
+
+
+def run() -> None:
+    """
+    Запуск приложения в продакшен-режиме.
+    Несколько воркеров uvicorn с uvloop и httptools, плавной остановкой
+    и перезапуском воркеров после limit_max_requests запросов со случайной
+    добавкой до limit_max_requests_jitter.
+    """
+    server = settings.server
+    config = uvicorn.Config(
+        "src.main:app",
+        host=server.host,
+        port=server.port,
+        workers=server.workers,
+        loop="uvloop",
+        http="httptools",
+        backlog=server.backlog,
+        timeout_keep_alive=server.timeout_keep_alive,
+        timeout_graceful_shutdown=server.timeout_graceful_shutdown,
+        limit_max_requests=server.limit_max_requests,
+        log_level=server.log_level,
+        proxy_headers=True,
+    )
+    jittered = JitteredServer(config, server.limit_max_requests_jitter)
+    if config.workers > 1:
+        sock = config.bind_socket()
+        Multiprocess(config, target=jittered.run, sockets=[sock]).run()
+    else:
+        jittered.run()
+
+
+if __name__ == "__main__":
+    run()
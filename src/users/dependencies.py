@@ -2,11 +2,15 @@ from fastapi import Depends
 from jwt.exceptions import ExpiredSignatureError, PyJWTError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..auth.dependencies import get_session_without_commit
+from ..auth.dependencies import get_session
+from ..auth.models import User
+from ..auth.principal import Principal
 from ..auth.schemas import UserId
 from ..auth.utils import decode_jwt, get_access_token
-from ..database.dao_class import UserDAO
+from ..config import settings
+from ..database.dao_class import USER_WITH_PROFILE, UserDAO
 from .exceptions import (
+    ForbiddenException,
     InvalidTokenException,
     TokenExpiredException,
     UserIdNotFoundException,
@@ -14,10 +18,8 @@ from .exceptions import (
 )
 
 
-async def get_current_user(
-    token: str = Depends(get_access_token),
-    session: AsyncSession = Depends(get_session_without_commit),
-):
+def _token_subject(token: str) -> tuple[dict, str]:
+    # Проверка токена и идентификатор пользователя из него
     try:
         payload = decode_jwt(token=token)
     except ExpiredSignatureError:
@@ -26,10 +28,47 @@ async def get_current_user(
         raise InvalidTokenException
     if not (user_id := payload.get("sub")):
         raise UserIdNotFoundException
+    return payload, user_id
+
+
+async def get_current_user(
+    token: str = Depends(get_access_token),
+    session: AsyncSession = Depends(get_session),
+) -> Principal:
+    """
+    Текущий пользователь в виде легкого неизменяемого Principal.
+    Строится из claims токена и проекции (id, email, is_active) одним запросом.
+    """
+    payload, user_id = _token_subject(token)
+    if not (row := await UserDAO().find_auth_row(session=session, user_id=user_id)):
+        raise UserNotFoundException
+    return Principal(
+        id=row.id,
+        email=row.email,
+        is_active=bool(row.is_active),
+        jti=payload.get("jti"),
+        exp=payload["exp"],
+    )
+
+
+async def get_current_user_entity(
+    token: str = Depends(get_access_token),
+    session: AsyncSession = Depends(get_session),
+) -> User:
+    """Полная сущность User с профилем для обработчиков, которым она нужна."""
+    _, user_id = _token_subject(token)
     if not (
         user := await UserDAO().find_one_or_none(
-            session=session, filters=UserId(id=user_id)
+            session=session,
+            filters=UserId(id=user_id),
+            options=USER_WITH_PROFILE,
         )
     ):
         raise UserNotFoundException
     return user
+
+
+async def get_current_admin(user: Principal = Depends(get_current_user)) -> Principal:
+    if user.email not in settings.ADMIN_EMAILS:
+        raise ForbiddenException
+    return user
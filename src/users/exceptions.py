@@ -28,3 +28,9 @@ InvalidTokenException = HTTPException(
 ForbiddenException = HTTPException(
     status_code=status.HTTP_403_FORBIDDEN, detail="Недостаточно прав"
 )
+
+
+# Неизвестные колонки выгрузки
+InvalidExportColumnsException = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST, detail="Неизвестные колонки выгрузки"
+)
@@ -0,0 +1,127 @@
+import argparse
+import asyncio
+import csv
+import io
+import json
+import sys
+import zlib
+from datetime import date
+from typing import AsyncIterator, Sequence
+
+from ..auth.models import Profile, User
+from ..config import settings
+from ..database.dao_class import UserDAO
+from ..database.database import async_session_maker
+from .schemas import ExportFormat, UserExportFilters
+
+# Колонки, доступные для выгрузки
+EXPORT_COLUMNS = {
+    "id": User.id,
+    "email": User.email,
+    "created_at": User.created_at,
+    "username": Profile.username,
+    "bio": Profile.bio,
+    "is_active": Profile.is_active,
+    "birthday": Profile.birthday,
+    "phone_number": Profile.phone_number,
+}
+
+
+async def export_users(
+    columns: Sequence[str],
+    filters: UserExportFilters,
+    export_format: ExportFormat,
+    compress: bool = False,
+    batch_size: int | None = None,
+) -> AsyncIterator[bytes]:
+    """
+    Потоковая выгрузка пользователей с профилями в NDJSON или CSV.
+    Строки читаются и кодируются порциями, поэтому память не зависит
+    от размера таблицы. Сессия открывается внутри генератора, так как
+    StreamingResponse читает его уже после завершения обработчика.
+    """
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    # wbits=31 - формат gzip
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    encode = _encode_csv if export_format == ExportFormat.CSV else _encode_ndjson
+    if export_format == ExportFormat.CSV:
+        yield _compress(compressor, _encode_csv([columns], columns))
+
+    async with async_session_maker() as session:
+        async for batch in UserDAO().stream_with_profile(
+            session=session,
+            columns=[EXPORT_COLUMNS[name] for name in columns],
+            filters=filters,
+            batch_size=batch_size,
+        ):
+            yield _compress(compressor, encode(batch, columns))
+
+    if compressor is not None:
+        yield compressor.flush()
+
+
+def _encode_ndjson(rows, columns: Sequence[str]) -> bytes:
+    return "".join(
+        json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str) + "\n"
+        for row in rows
+    ).encode()
+
+
+def _encode_csv(rows, columns: Sequence[str]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def _compress(compressor, chunk: bytes) -> bytes:
+    return compressor.compress(chunk) if compressor is not None else chunk
+
+
+async def _write(args: argparse.Namespace) -> None:
+    filters = UserExportFilters(
+        is_active=args.is_active,
+        created_from=args.created_from,
+        created_to=args.created_to,
+    )
+    output = open(args.out, "wb") if args.out else sys.stdout.buffer
+    try:
+        async for chunk in export_users(
+            columns=args.columns,
+            filters=filters,
+            export_format=args.format,
+            compress=args.gzip,
+            batch_size=args.batch_size,
+        ):
+            output.write(chunk)
+    finally:
+        if args.out:
+            output.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Потоковая выгрузка пользователей")
+    parser.add_argument(
+        "--format", type=ExportFormat, choices=list(ExportFormat), default="ndjson"
+    )
+    parser.add_argument(
+        "--columns",
+        type=lambda value: value.split(","),
+        default=list(EXPORT_COLUMNS),
+        help="Колонки через запятую: " + ",".join(EXPORT_COLUMNS),
+    )
+    parser.add_argument(
+        "--is-active", type=lambda value: value.lower() == "true", default=None
+    )
+    parser.add_argument("--created-from", type=date.fromisoformat, default=None)
+    parser.add_argument("--created-to", type=date.fromisoformat, default=None)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--gzip", action="store_true", help="Сжать выгрузку gzip")
+    parser.add_argument("--out", help="Файл выгрузки, по умолчанию stdout")
+    args = parser.parse_args()
+    if unknown := set(args.columns) - set(EXPORT_COLUMNS):
+        parser.error(f"Неизвестные колонки: {', '.join(sorted(unknown))}")
+    asyncio.run(_write(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,32 @@
-from fastapi import APIRouter, Depends, status
+from datetime import date
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..auth.dependencies import get_session_with_commit
+from ..auth.dependencies import get_session
 from ..auth.models import User
+from ..auth.principal import Principal
 from ..auth.schemas import UserId
-from ..database.dao_class import ProfileDAO
-from .dependencies import get_current_user
-from .schemas import Profile, SUserInfo
+from ..database.dao_class import ProfileDAO, UserDAO
+from ..database.query_stats import QueryBudget
+from ..database.writer import run_write
+from .dependencies import (
+    get_current_admin,
+    get_current_user,
+    get_current_user_entity,
+)
+from .exceptions import InvalidExportColumnsException, UserNotFoundException
+from .export import EXPORT_COLUMNS, export_users
+from .schemas import (
+    ExportFormat,
+    Profile,
+    SUserInfo,
+    UserExportFilters,
+    UserSearchPage,
+    UserSearchResult,
+)
 
 router = APIRouter(tags=["Users"])
 
@@ -16,8 +36,9 @@ router = APIRouter(tags=["Users"])
     status_code=status.HTTP_200_OK,
     description="Получение информации о текущем пользователе",
     response_model=SUserInfo,
+    dependencies=[Depends(QueryBudget(1))],
 )
-async def get_me(user_data: User = Depends(get_current_user)) -> SUserInfo:
+async def get_me(user_data: User = Depends(get_current_user_entity)) -> SUserInfo:
     return SUserInfo.model_validate(user_data)
 
 
@@ -26,13 +47,80 @@ async def get_me(user_data: User = Depends(get_current_user)) -> SUserInfo:
     status_code=status.HTTP_200_OK,
     description="Обновление информации о текущем пользователе",
     response_model=SUserInfo,
+    dependencies=[Depends(QueryBudget(4))],
 )
 async def update_me(
     profile: Profile,
-    user_data: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session_with_commit),
+    user_data: Principal = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> SUserInfo:
-    user_data = await ProfileDAO().update_profile(
-        session=session, filters=UserId(id=user_data.id), values=profile
+    if not (
+        profile_data := await run_write(
+            session,
+            lambda session: ProfileDAO().update_profile(
+                session=session, filters=UserId(id=user_data.id), values=profile
+            ),
+        )
+    ):
+        raise UserNotFoundException
+    return SUserInfo(
+        id=user_data.id,
+        email=user_data.email,
+        profile=Profile.model_validate(profile_data),
+    )
+
+
+@router.get(
+    "/users/export",
+    status_code=status.HTTP_200_OK,
+    description="Потоковая выгрузка пользователей в NDJSON или CSV",
+    dependencies=[Depends(get_current_admin)],
+)
+async def export_users_endpoint(
+    export_format: Annotated[ExportFormat, Query(alias="format")] = ExportFormat.NDJSON,
+    columns: Annotated[list[str] | None, Query(description="Колонки выгрузки")] = None,
+    is_active: Annotated[bool | None, Query()] = None,
+    created_from: Annotated[date | None, Query()] = None,
+    created_to: Annotated[date | None, Query()] = None,
+    gzip: Annotated[bool, Query(description="Сжать выгрузку gzip")] = False,
+) -> StreamingResponse:
+    filters = UserExportFilters(
+        is_active=is_active, created_from=created_from, created_to=created_to
+    )
+    columns = columns or list(EXPORT_COLUMNS)
+    if set(columns) - set(EXPORT_COLUMNS):
+        raise InvalidExportColumnsException
+    media_type = (
+        "text/csv" if export_format == ExportFormat.CSV else "application/x-ndjson"
+    )
+    filename = f"users.{export_format.value}"
+    if gzip:
+        media_type, filename = "application/gzip", f"{filename}.gz"
+    return StreamingResponse(
+        export_users(columns, filters, export_format, compress=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get(
+    "/users/search",
+    status_code=status.HTTP_200_OK,
+    description="Поиск пользователей по части email, имени пользователя или телефона",
+    response_model=UserSearchPage,
+    dependencies=[Depends(get_current_admin), Depends(QueryBudget(2))],
+)
+async def search_users(
+    q: Annotated[
+        str, Query(min_length=3, max_length=128, description="Строка поиска")
+    ],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    offset: Annotated[int, Query(ge=0)] = 0,
+    session: AsyncSession = Depends(get_session),
+) -> UserSearchPage:
+    rows = await UserDAO().search(session=session, query=q, limit=limit, offset=offset)
+    return UserSearchPage(
+        items=[UserSearchResult.model_validate(row) for row in rows],
+        limit=limit,
+        offset=offset,
     )
-    return SUserInfo.model_validate(user_data)
@@ -1,4 +1,5 @@
 from datetime import date
+from enum import Enum
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -18,3 +19,28 @@ class SUserInfo(BaseUser):
     profile: Profile = Field(
         None, description="Профиль пользователя, содержащий дополнительную информацию"
     )
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class UserExportFilters(BaseModel):
+    is_active: bool | None = Field(None, description="Только активные/неактивные")
+    created_from: date | None = Field(None, description="Зарегистрированы с даты")
+    created_to: date | None = Field(None, description="Зарегистрированы до даты")
+
+
+class UserSearchResult(BaseModel):
+    id: str = Field(..., description="Уникальный идентификатор пользователя")
+    email: str = Field(..., description="Email пользователя")
+    username: str | None = Field(None, description="Уникальное имя пользователя")
+    phone_number: str | None = Field(None, description="Номер телефона пользователя")
+    model_config = ConfigDict(from_attributes=True)
+
+
+class UserSearchPage(BaseModel):
+    items: list[UserSearchResult]
+    limit: int
+    offset: int
@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+from fastapi import FastAPI
+from fastapi.templating import Jinja2Templates
+from loguru import logger
+from sqlalchemy import text
+
+from src.auth.models import User
+from src.auth.schemas import UserEmail, UserId
+from src.auth.utils import decode_jwt, encode_jwt
+from src.config import Warmup, settings
+from src.database.dao_class import USER_WITH_PROFILE, UserDAO
+from src.database.database import async_session_maker, engine
+from src.users.schemas import SUserInfo
+
+WARMUP_USER_ID = "00000000-0000-0000-0000-000000000000"
+
+
+async def warm_up(
+    app: FastAPI, templates: Jinja2Templates, config: Warmup | None = None
+) -> None:
+    """
+    Прогрев воркера после старта: соединения пула, ключи JWT, кеш
+    скомпилированных запросов, валидаторы pydantic и главная страница.
+    Ошибка отдельного шага только логируется - прогрев лишь оптимизация.
+    По завершении app.state.ready становится True, и /health/ready отвечает 200.
+    """
+    config = config or settings.warmup
+    start = time.perf_counter()
+    steps = (
+        ("соединения пула", _open_pool_connections(config.pool_connections)),
+        ("ключи JWT", _sign_and_verify()),
+        ("запросы UserDAO", _prime_statements()),
+        ("главная страница", _render_index(app, templates)),
+    )
+    for name, step in steps:
+        step_start = time.perf_counter()
+        try:
+            await step
+            logger.info(
+                f"Прогрев: {name} за {(time.perf_counter() - step_start) * 1000:.1f} мс"
+            )
+        except Exception as e:
+            logger.warning(f"Прогрев: шаг '{name}' не выполнен: {e}")
+    app.state.ready = True
+    logger.info(f"Прогрев завершен за {(time.perf_counter() - start) * 1000:.1f} мс")
+
+
+async def _open_pool_connections(count: int) -> None:
+    # Одновременно открытые соединения остаются в пуле после возврата
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(ping() for _ in range(count)))
+
+
+async def _sign_and_verify() -> None:
+    # Первый вызов разбирает RSA-ключи и инициализирует криптобэкенд
+    decode_jwt(token=encode_jwt(payload={"id": WARMUP_USER_ID}))
+
+
+async def _prime_statements() -> None:
+    # Те же запросы, что выполняют вход, обновление токена, /me и аутентификация
+    # запроса: после выполнения они попадают в кеш скомпилированных запросов движка
+    async with async_session_maker() as session:
+        dao = UserDAO()
+        await dao.find_one_or_none(
+            session=session,
+            filters=UserEmail(email="warmup@example.com"),
+            columns=(User.id, User.email, User.hashed_password),
+        )
+        await dao.find_one_or_none(
+            session=session,
+            filters=UserId(id=WARMUP_USER_ID),
+            columns=(User.id, User.email),
+        )
+        await dao.find_one_or_none(
+            session=session,
+            filters=UserId(id=WARMUP_USER_ID),
+            options=USER_WITH_PROFILE,
+        )
+        await dao.find_auth_row(session=session, user_id=WARMUP_USER_ID)
+    SUserInfo.model_validate({"id": WARMUP_USER_ID, "email": "warmup@example.com"})
+
+
+async def _render_index(app: FastAPI, templates: Jinja2Templates) -> None:
+    # Главная страница статична: рендерим один раз и отдаем готовый HTML
+    app.state.index_html = templates.get_template("index.html").render()
@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def pytest_configure(config):
+    # Движок приложения при импорте src привязывается к AuthJWT.sqlite3
+    # в рабочем каталоге, поэтому тесты выполняются во временном каталоге
+    sys.path.insert(0, str(ROOT))
+    os.chdir(tempfile.mkdtemp(prefix="auth-jwt-tests-"))
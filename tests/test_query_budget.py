@@ -0,0 +1,100 @@
+"""
+Бюджеты SQL-запросов маршрутов в строгом режиме: превышение бюджета
+(например, N+1 после изменения зависимостей) должно ронять тест.
+"""
+
+import uuid
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import Depends
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.auth import utils
+from src.auth.dependencies import get_session
+from src.auth.schemas import UserId, UserInDB
+from src.config import AccessTokenType, settings
+from src.database.dao_class import USER_WITH_PROFILE, ProfileDAO, UserDAO
+from src.database.database import async_session_maker
+from src.database.query_stats import QueryBudgetExceeded
+from src.main import app
+from src.users.dependencies import get_access_token, get_current_user_entity
+
+
+@pytest.fixture
+def jwt_keys(tmp_path, monkeypatch):
+    # Временная пара ключей RSA вместо ключей из src/certs
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_path = tmp_path / "jwt-private.pem"
+    public_path = tmp_path / "jwt-public.pem"
+    private_path.write_bytes(
+        key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+    public_path.write_bytes(
+        key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+    )
+    monkeypatch.setattr(settings.auth_jwt, "private_key_path", private_path)
+    monkeypatch.setattr(settings.auth_jwt, "public_key_path", public_path)
+    utils._signing_key.cache_clear()
+    utils._verifying_key.cache_clear()
+    yield
+    utils._signing_key.cache_clear()
+    utils._verifying_key.cache_clear()
+
+
+@pytest.fixture
+def client(monkeypatch, jwt_keys):
+    monkeypatch.setattr(settings, "DB_CREATE_ON_STARTUP", True)
+    monkeypatch.setattr(settings.warmup, "enabled", False)
+    monkeypatch.setattr(settings.sql_stats, "strict_budget", True)
+    with TestClient(app) as client:
+        user_id = client.portal.call(_register, f"{uuid.uuid4().hex}@example.com")
+        client.cookies.set(
+            AccessTokenType.ACCESS.value, utils.encode_jwt(payload={"id": user_id})
+        )
+        yield client
+    app.dependency_overrides.clear()
+
+
+async def _register(email: str) -> str:
+    async with async_session_maker() as session:
+        user = await UserDAO().register_user(
+            session=session, values=UserInDB(email=email, hashed_password="x")
+        )
+        user_id = user.id
+        await session.commit()
+        return user_id
+
+
+def test_me_within_budget(client):
+    response = client.get("/me")
+
+    assert response.status_code == 200
+
+
+def test_me_over_budget_raises(client):
+    # Лишний запрос профиля поверх загрузки пользователя с профилем
+    async def current_user_extra_query(
+        token: str = Depends(get_access_token),
+        session: AsyncSession = Depends(get_session),
+    ):
+        user_id = utils.decode_jwt(token=token)["sub"]
+        user = await UserDAO().find_one_or_none(
+            session=session, filters=UserId(id=user_id), options=USER_WITH_PROFILE
+        )
+        await ProfileDAO().find_one_or_none(session=session, filters=UserId(id=user_id))
+        return user
+
+    app.dependency_overrides[get_current_user_entity] = current_user_extra_query
+
+    with pytest.raises(QueryBudgetExceeded):
+        client.get("/me")